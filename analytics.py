@@ -0,0 +1,113 @@
+import pandas as pd
+
+from grading import DEFAULT_SCHEMA
+
+TOP_COLUMNS = ['Name', 'Roll Number', 'Total', 'Percentage', 'Grade']
+
+# Running class statistics, updated as students are added
+# A batch costs one vectorized pass over the new rows; the class is never rescanned
+class ClassStats:
+    def __init__(self, schema=DEFAULT_SCHEMA, top_count=5):
+        self.schema = schema
+        self.top_count = top_count
+        self.columns = schema.subjects + ["Percentage"]
+        self.count = 0
+        self.sums = dict.fromkeys(self.columns, 0)
+        self.mins = {}
+        self.maxs = {}
+        self.passes = dict.fromkeys(schema.subjects, 0)
+        self.grades = dict.fromkeys(schema.grades, 0)
+        self.top = pd.DataFrame(columns=TOP_COLUMNS)
+
+    # Function to fold a batch of graded students into the totals
+    def update(self, batch):
+        if batch.empty:
+            return
+        self.count += len(batch)
+        
+        summary = batch[self.columns].agg(["sum", "min", "max"])
+        for column in self.columns:
+            self.sums[column] += summary.at["sum", column].item()
+            low, high = summary.at["min", column].item(), summary.at["max", column].item()
+            self.mins[column] = min(self.mins.get(column, low), low)
+            self.maxs[column] = max(self.maxs.get(column, high), high)
+        
+        subjects = self.schema.subjects
+        for subject, passed in batch[subjects].ge(pd.Series(self.schema.pass_marks)).sum().items():
+            self.passes[subject] += int(passed)
+        for grade, count in batch["Grade"].value_counts().items():
+            self.grades[grade] += int(count)
+        
+        # Earlier students come first, so ties keep the roster order
+        candidates = batch[TOP_COLUMNS].nlargest(self.top_count, "Percentage", keep="first")
+        if not self.top.empty:
+            candidates = pd.concat([self.top, candidates])
+        self.top = candidates.nlargest(self.top_count, "Percentage", keep="first")
+
+    # Function to fold another set of totals into this one, e.g. to add up classes
+    def merge(self, other):
+        if other.schema.subjects != self.schema.subjects or other.schema.grades != self.schema.grades:
+            raise ValueError("Only classes graded on the same subjects and grades can be combined.")
+        if not other.count:
+            return
+        self.count += other.count
+        for column in self.columns:
+            self.sums[column] += other.sums[column]
+            self.mins[column] = min(self.mins.get(column, other.mins[column]), other.mins[column])
+            self.maxs[column] = max(self.maxs.get(column, other.maxs[column]), other.maxs[column])
+        for subject in self.schema.subjects:
+            self.passes[subject] += other.passes[subject]
+        for grade in self.schema.grades:
+            self.grades[grade] += other.grades[grade]
+        candidates = other.top if self.top.empty else pd.concat([self.top, other.top])
+        self.top = candidates.nlargest(self.top_count, "Percentage", keep="first")
+
+    # Function to add up several sets of totals without touching the students behind them
+    @classmethod
+    def combine(cls, parts, schema=None):
+        parts = list(parts)
+        total = cls(schema or (parts[0].schema if parts else DEFAULT_SCHEMA))
+        for part in parts:
+            total.merge(part)
+        return total
+
+    # Function to get the mean of a subject or of Percentage
+    def mean(self, column):
+        return self.sums[column] / self.count if self.count else float("nan")
+
+    # Function to get the share of students passing a subject, as a percentage
+    def pass_rate(self, subject):
+        return self.passes[subject] / self.count * 100 if self.count else float("nan")
+
+# Function to compute the headline numbers for the class
+def class_metrics(stats):
+    return {
+        "Total Students": stats.count,
+        "Class Average": stats.mean("Percentage"),
+        "Highest Score": stats.maxs.get("Percentage", float("nan")),
+        "Lowest Score": stats.mins.get("Percentage", float("nan")),
+    }
+
+# Function to compute Average, Highest, Lowest and Pass Rate for each subject
+def subject_statistics(stats):
+    subject_stats = {}
+    for subject in stats.schema.subjects:
+        subject_stats[subject] = {
+            'Average': stats.mean(subject),
+            'Highest': stats.maxs.get(subject),
+            'Lowest': stats.mins.get(subject),
+            'Pass Rate': stats.pass_rate(subject)
+        }
+    return pd.DataFrame(subject_stats).T
+
+# Function to pick the best students by percentage
+def top_performers(stats):
+    return stats.top.reset_index(drop=True)
+
+# Function to compute everything the Class Analytics tab shows, apart from the charts
+def class_analytics(stats):
+    return {
+        "metrics": class_metrics(stats),
+        "subjects": subject_statistics(stats),
+        "top": top_performers(stats),
+    }
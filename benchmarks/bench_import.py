@@ -0,0 +1,64 @@
+# Benchmark: bulk import throughput, per-row iterrows loop vs vectorized engine
+#
+# Run from the repository root:
+#     python benchmarks/bench_import.py --rows 1000 20000 50000
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grading import calculate_grade
+from roster import Roster
+from synthetic import make_upload
+
+# The import loop as it was before the vectorized engine
+def legacy_import(df):
+    students = []
+    for _, row in df.iterrows():
+        total_marks = row['Math'] + row['Physics'] + row['Urdu'] + row['English'] + row['Computer']
+        percentage = (total_marks / 500) * 100
+        grade = calculate_grade(percentage)
+        students.append({
+            "Name": row['Name'],
+            "Roll Number": str(row['Roll Number']),
+            "Math": row['Math'],
+            "Physics": row['Physics'],
+            "Urdu": row['Urdu'],
+            "English": row['English'],
+            "Computer": row['Computer'],
+            "Total": total_marks,
+            "Percentage": percentage,
+            "Grade": grade
+        })
+    return students
+
+# The vectorized engine: grade the whole upload and merge it into a roster in one batch
+def roster_import(df):
+    roster = Roster()
+    roster.extend(df)
+    return roster
+
+# Function to time a single import and return rows per second
+def rows_per_second(import_func, df):
+    start = time.perf_counter()
+    import_func(df)
+    elapsed = time.perf_counter() - start
+    return len(df) / elapsed if elapsed else float("inf")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bulk import throughput.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 20000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'iterrows rows/s':>16}  {'vectorized rows/s':>18}  {'speedup':>8}")
+    for rows in args.rows:
+        df = make_upload(rows)
+        legacy = rows_per_second(legacy_import, df)
+        vectorized = rows_per_second(roster_import, df)
+        print(f"{rows:>8}  {legacy:>16,.0f}  {vectorized:>18,.0f}  {vectorized / legacy:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Benchmark: whole-class report card throughput, single document vs parallel ZIP
+#
+# Run from the repository root:
+#     python benchmarks/bench_pdf.py --students 2000 --workers 1 2 4
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from roster import Roster
+from report_pdf import create_pdf, create_zip
+from synthetic import make_upload
+
+# Function to time a call and return students per second
+def students_per_second(func, students, **kwargs):
+    start = time.perf_counter()
+    path = func(students, **kwargs)
+    elapsed = time.perf_counter() - start
+    os.remove(path)
+    return len(students) / elapsed if elapsed else float("inf")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare report card rendering throughput.")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-size", type=int, default=100)
+    args = parser.parse_args()
+
+    roster = Roster()
+    roster.extend(make_upload(args.students))
+    students = list(roster)
+    ranks = roster.ranks()
+
+    single = students_per_second(create_pdf, students, class_name="10-A", ranks=ranks)
+    print(f"{'mode':>18}  {'students/s':>11}  {'speedup':>8}")
+    print(f"{'single document':>18}  {single:>11,.0f}  {1:>7.1f}x")
+    for workers in args.workers:
+        rate = students_per_second(
+            create_zip, students, class_name="10-A", ranks=ranks,
+            workers=workers, chunk_size=args.chunk_size,
+        )
+        print(f"{f'zip, {workers} workers':>18}  {rate:>11,.0f}  {rate / single:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Benchmark: cold-start cost of the app's modules and of the first chart and PDF
+#
+# Run from the repository root:
+#     python benchmarks/bench_startup.py --repeat 5
+#     python benchmarks/bench_startup.py --importtime report_pdf   # per-module breakdown
+#
+# Every measurement runs in a fresh interpreter, as a newly started server worker would,
+# and the median over --repeat runs is reported. "first chart" and "first pdf" time the
+# first render after the imports, which is where lazily loaded libraries are paid for.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules grand-result.py imports from this repository
+APP_MODULES = ["roster", "report_pdf", "downloads", "analytics", "charts", "ingest", "storage", "school", "profiling", "jobs"]
+
+SETUP = "import time; start = time.perf_counter()\n"
+REPORT = "\nprint(time.perf_counter() - start)"
+
+APP = "AppTest.from_file('grand-result.py', default_timeout=120)"
+
+# (name, code timed in a fresh interpreter, code run before the clock starts)
+CASES = [
+    ("import pandas", "import pandas", ""),
+    ("import app modules", "\n".join(f"import {module}" for module in APP_MODULES), "import pandas, streamlit"),
+    ("first chart", "charts.radar_chart_png((50, 60, 70, 80, 90))", "import charts"),
+    ("first pdf", "report_pdf.create_pdf_bytes([student])",
+     "import report_pdf\nstudent = dict(Name='A', **{'Roll Number': '1'}, Math=1, Physics=2, Urdu=3, English=4, "
+     "Computer=5, Total=15, Percentage=3.0, Grade='Fail')"),
+    ("first app run", f"{APP}.run()", "from streamlit.testing.v1 import AppTest"),
+    # The pause stands in for the user's next click, by which time the warm-up has finished
+    ("app rerun", "app.run()", f"import time\nfrom streamlit.testing.v1 import AppTest\napp = {APP}\napp.run()\ntime.sleep(3)"),
+]
+
+# Function to time a snippet in a new interpreter, in seconds
+# The app gets a throwaway database so saved classes are left alone
+def cold_time(code, setup=""):
+    script = f"{setup}\n{SETUP}{code}{REPORT}"
+    with tempfile.TemporaryDirectory() as directory:
+        env = {**os.environ, "REPORT_CARD_DB": os.path.join(directory, "bench.db")}
+        result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+# Function to print the slowest imports under a module, from python -X importtime
+def importtime(module, top=15):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    for cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>9.1f} ms  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import and first-render times.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--importtime", metavar="MODULE", help="show the slowest imports under MODULE instead")
+    args = parser.parse_args()
+
+    if args.importtime:
+        importtime(args.importtime)
+        return
+
+    print(f"{'case':>20}  {'median ms':>10}  {'min ms':>8}")
+    for name, code, setup in CASES:
+        timings = [cold_time(code, setup) for _ in range(args.repeat)]
+        print(f"{name:>20}  {statistics.median(timings) * 1000:>10.1f}  {min(timings) * 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# Benchmark suite: times every hot path on synthetic classes of increasing size
+#
+# Run from the repository root:
+#     python benchmarks/run_all.py --students 100 1000 10000 100000 --output bench_results.json
+#     python benchmarks/run_all.py --baseline bench_results.json   # compare with an earlier run
+#
+# Each stage is timed --repeat times on the same synthetic class and the best run is
+# kept; it is then run once more under tracemalloc to find the peak memory it allocated.
+# Results are written as JSON, one entry per (stage, class size), together with the
+# commit and package versions they were measured with.
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from importlib import metadata
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import ClassStats, class_analytics
+from bench_import import legacy_import
+from charts import create_class_performance_charts
+from ingest import ingest_csv
+from report_pdf import create_pdf, page_cache
+from roster import Roster, competition_ranks
+from synthetic import make_csv
+
+PACKAGES = ["numpy", "pandas", "matplotlib", "fpdf", "streamlit"]
+
+# Synthetic data shared by the stages for one class size; built once and not timed
+class BenchData:
+    def __init__(self, students, seed=0, pdf_limit=10_000):
+        self.csv = make_csv(students, seed)
+        self.roster = Roster()
+        ingest_csv(self.csv, self.roster)
+        self.records = list(self.roster)
+        self.ranks = self.roster.ranks()
+        self.pdf_count = min(students, pdf_limit)
+
+# Stages: each takes the BenchData and returns how many items it processed
+def stage_import_legacy(data):
+    data.csv.seek(0)
+    return len(legacy_import(pd.read_csv(data.csv, dtype={"Roll Number": str})))
+
+def stage_import(data):
+    data.csv.seek(0)
+    return ingest_csv(data.csv, Roster())
+
+def stage_analytics_frame(data):
+    return len(pd.DataFrame(data.records))
+
+def stage_analytics(data):
+    stats = ClassStats(data.roster.schema)
+    stats.update(data.roster.frame)
+    class_analytics(stats)
+    return stats.count
+
+def stage_charts(data):
+    create_class_performance_charts(data.roster)
+    return len(data.roster)
+
+def stage_ranks(data):
+    return len(competition_ranks(data.roster.frame["Percentage"].to_numpy()))
+
+# Every page rendered from scratch
+def stage_pdf(data):
+    page_cache.clear()
+    return stage_pdf_cached(data)
+
+# Pages from the page cache, as when the same class is exported again
+def stage_pdf_cached(data):
+    path = create_pdf(data.records[:data.pdf_count], class_name="10-A", ranks=data.ranks[:data.pdf_count])
+    os.remove(path)
+    return data.pdf_count
+
+# (name, unit of the throughput, function)
+STAGES = [
+    ("import_legacy", "rows/s", stage_import_legacy),
+    ("import", "rows/s", stage_import),
+    ("analytics_frame", "rows/s", stage_analytics_frame),
+    ("analytics", "rows/s", stage_analytics),
+    ("charts", "rows/s", stage_charts),
+    ("ranks", "rows/s", stage_ranks),
+    ("pdf", "pages/s", stage_pdf),
+    ("pdf_cached", "pages/s", stage_pdf_cached),
+]
+
+# Function to time a stage; returns (best seconds, median seconds, items processed)
+def time_stage(func, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        items = func(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings), items
+
+# Function to find the most memory a stage allocates at once, in bytes
+def peak_memory(func, data):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+# Function to describe where the results were measured
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    packages = {}
+    for package in PACKAGES:
+        try:
+            packages[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            packages[package] = None
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": packages,
+    }
+
+# Function to read an earlier results file as {(stage, students): best seconds}
+def load_baseline(path):
+    with open(path) as f:
+        results = json.load(f)["results"]
+    return {(r["stage"], r["students"]): r["seconds"] for r in results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Time import, analytics, charts, ranks and PDF rendering.")
+    parser.add_argument("--students", type=int, nargs="+", default=[100, 1000, 10_000, 100_000])
+    parser.add_argument("--stages", nargs="+", choices=[name for name, _, _ in STAGES], help="stages to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage; the best is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf-limit", type=int, default=10_000, help="most report cards rendered by the pdf stages")
+    parser.add_argument("--no-memory", action="store_true", help="skip the extra run that measures peak memory")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    stages = [stage for stage in STAGES if not args.stages or stage[0] in args.stages]
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    results = []
+
+    print(f"{'stage':>16}  {'students':>9}  {'seconds':>9}  {'throughput':>18}  {'peak MiB':>9}  {'vs baseline':>11}")
+    for students in args.students:
+        data = BenchData(students, args.seed, args.pdf_limit)
+        for name, unit, func in stages:
+            best, median, items = time_stage(func, data, args.repeat)
+            peak = None if args.no_memory else peak_memory(func, data)
+            rate = items / best if best else float("inf")
+            results.append({
+                "stage": name,
+                "students": students,
+                "items": items,
+                "seconds": best,
+                "median_seconds": median,
+                "rate": rate,
+                "unit": unit,
+                "peak_bytes": peak,
+            })
+
+            peak_text = "-" if peak is None else f"{peak / 2**20:.1f}"
+            previous = baseline.get((name, students))
+            change = f"{previous / best:.2f}x" if previous and best else "-"
+            print(f"{name:>16}  {students:>9,}  {best:>9.4f}  {f'{rate:,.0f} {unit}':>18}  {peak_text:>9}  {change:>11}")
+
+    with open(args.output, "w") as f:
+        json.dump({**environment(), "repeat": args.repeat, "seed": args.seed, "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from grading import DEFAULT_SCHEMA
+from profiling import profiled
+
+# Figures are built with the object-oriented API and never registered with pyplot,
+# so nothing keeps them alive once their PNG has been written.
+# matplotlib is imported on the first chart rather than with this module, since it
+# takes longer to load than everything else the app needs to show its first page.
+
+# Function to create a figure drawn by the non-interactive Agg canvas
+def new_figure(**kwargs):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+# Function to load matplotlib and its fonts ahead of the first real chart
+def warm_up():
+    fig = new_figure(figsize=(1, 1))
+    ax = fig.add_subplot()
+    ax.bar(["A"], [1])
+    ax.set_title("Warm-up")
+    figure_png(fig)
+
+# Function to render a figure to PNG bytes and release it
+def figure_png(fig, **savefig_kwargs):
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format='png', **savefig_kwargs)
+    finally:
+        fig.clear()
+    return buf.getvalue()
+
+# Function to create class performance charts
+@profiled
+def create_class_performance_charts(students):
+    if not students:
+        return None
+    
+    # Columnar roster table for analysis
+    df = students.frame
+    subjects = students.schema.subjects
+    
+    # Create a figure with multiple subplots
+    fig = new_figure(figsize=(12, 10))
+    axs = fig.subplots(2, 2)
+    
+    # 1. Grade Distribution
+    grade_counts = df['Grade'].value_counts().sort_index()
+    grade_counts = grade_counts[grade_counts > 0]
+    axs[0, 0].bar(grade_counts.index.astype(str), grade_counts.values, color='skyblue')
+    axs[0, 0].set_title('Grade Distribution')
+    axs[0, 0].set_xlabel('Grade')
+    axs[0, 0].set_ylabel('Number of Students')
+    
+    # 2. Subject Performance
+    avg_marks = [df[subject].mean() for subject in subjects]
+    axs[0, 1].bar(subjects, avg_marks, color='lightgreen')
+    axs[0, 1].set_title('Average Marks by Subject')
+    axs[0, 1].set_xlabel('Subject')
+    axs[0, 1].set_ylabel('Average Marks')
+    axs[0, 1].set_ylim(0, max(students.schema.max_marks.values()))
+    
+    # 3. Percentage Distribution
+    axs[1, 0].hist(df['Percentage'], bins=10, color='salmon', edgecolor='black')
+    axs[1, 0].set_title('Percentage Distribution')
+    axs[1, 0].set_xlabel('Percentage')
+    axs[1, 0].set_ylabel('Number of Students')
+    
+    # 4. Top 5 Students
+    top_students = df.sort_values('Percentage', ascending=False).head(5)
+    axs[1, 1].barh(top_students['Name'], top_students['Percentage'], color='gold')
+    axs[1, 1].set_title('Top 5 Students')
+    axs[1, 1].set_xlabel('Percentage')
+    axs[1, 1].set_ylabel('Student Name')
+    axs[1, 1].invert_yaxis()  # To have the highest at the top
+    
+    fig.tight_layout()
+    
+    # Convert plot to image
+    return io.BytesIO(figure_png(fig))
+
+# Memory kept for radar chart images (about 100 KB each at the resolution drawn)
+RADAR_CACHE_BYTES = 16 * 2**20
+
+# Radar chart PNGs by (marks, subjects), least recently used first
+_radar_cache = OrderedDict()
+_radar_cache_size = 0
+_radar_cache_lock = threading.Lock()
+
+# Function to draw a radar chart of one student's marks, each as a percentage of the
+# subject's maximum; cached by its arguments, so students with the same marks share
+# one image, and the least recently used images are dropped past RADAR_CACHE_BYTES
+def radar_chart_png(marks, subjects=tuple(DEFAULT_SCHEMA.subjects)):
+    global _radar_cache_size
+    key = (tuple(marks), tuple(subjects))
+    with _radar_cache_lock:
+        png = _radar_cache.get(key)
+        if png is not None:
+            _radar_cache.move_to_end(key)
+            return png
+    
+    png = _draw_radar_chart(*key)
+    with _radar_cache_lock:
+        if key not in _radar_cache:
+            _radar_cache[key] = png
+            _radar_cache_size += len(png)
+            while _radar_cache_size > RADAR_CACHE_BYTES:
+                _, dropped = _radar_cache.popitem(last=False)
+                _radar_cache_size -= len(dropped)
+    return png
+
+def _draw_radar_chart(marks, subjects):
+    angles = np.linspace(0, 2*np.pi, len(subjects), endpoint=False).tolist()
+    angles += angles[:1]  # Close the loop
+    
+    subject_values = list(marks) + list(marks[:1])  # Close the loop
+    
+    fig = new_figure(figsize=(4, 4))
+    ax = fig.add_subplot(polar=True)
+    ax.plot(angles, subject_values, 'o-', linewidth=2)
+    ax.fill(angles, subject_values, alpha=0.25)
+    ax.set_thetagrids(np.degrees(angles[:-1]), subjects)
+    ax.set_ylim(0, 100)
+    ax.grid(True)
+    
+    # Same output settings st.pyplot uses
+    return figure_png(fig, bbox_inches='tight', dpi=200)
+
+# Function to get the radar chart for a student record
+def student_radar_png(student, schema=DEFAULT_SCHEMA):
+    marks = tuple(student[subject] * 100 / schema.max_marks[subject] for subject in schema.subjects)
+    return radar_chart_png(marks, tuple(schema.subjects))
@@ -0,0 +1,145 @@
+# Generate report cards and class analytics without the Streamlit UI
+#
+#     python cli.py students.csv --output reports/ --class-name "10-A" --class-teacher "Ms. Khan"
+#
+# Reads a CSV or Parquet file with the same columns as the Bulk Upload tab and writes:
+#   class_report_cards.pdf   all report cards in one document (or report_cards.zip with --zip)
+#   class_results.csv        every student with Total, Percentage, Grade and Class Rank
+#   subject_statistics.csv   Average, Highest, Lowest and Pass Rate per subject
+#   class_summary.json       class metrics and grade counts
+#   class_charts.png         the Class Analytics charts
+#
+# With --schema the subjects, maximum marks, weights and grade bands are read from a JSON
+# file with the keys of GradingSchema.to_dict; the columns expected follow its subjects.
+#
+# With --by-class the file also has Class and Section columns. Each class is graded
+# and ranked on its own and written to <output>/<class>-<section>/, and the school
+# totals go to school_summary.csv, school_subject_statistics.csv and school_summary.json.
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import pandas as pd
+
+from analytics import class_metrics, subject_statistics
+from charts import create_class_performance_charts
+from grading import DEFAULT_SCHEMA, GradingSchema
+import ingest
+from report_pdf import build_pdf, create_zip
+from roster import Roster
+from school import PARTITION_COLUMNS, School
+
+# Function to build a roster from a CSV or Parquet student file
+def load_roster(path, schema=DEFAULT_SCHEMA):
+    roster = Roster(schema)
+    if path.lower().endswith(".parquet"):
+        # Checked like a CSV chunk before any column is converted; rows are numbered from 1
+        df = pd.read_parquet(path, columns=schema.input_columns).reset_index(drop=True)
+        errors = ingest.validate_chunk(df, schema, first_line=1)
+        if errors:
+            raise ValueError(". ".join(errors) + ".")
+        df["Roll Number"] = df["Roll Number"].astype(str)
+        roster.extend(df.astype({subject: schema.mark_dtype for subject in schema.subjects}))
+    else:
+        with open(path, "rb") as f:
+            ingest.ingest_csv(f, roster)
+    return roster
+
+# Function to build a school from a CSV or Parquet file with Class and Section columns
+def load_school(path, schema=DEFAULT_SCHEMA, workers=None):
+    if path.lower().endswith(".parquet"):
+        # Parquet rows are numbered from 1
+        return School.from_frame(pd.read_parquet(path), schema, workers, first_line=1)
+    text_columns = PARTITION_COLUMNS + ["Name", "Roll Number"]
+    df = pd.read_csv(path, dtype={column: str for column in text_columns})
+    return School.from_frame(df, schema, workers)
+
+# Function to write every report and analytics file for a roster into a directory
+def write_reports(roster, output_dir, class_name="", class_teacher="", as_zip=False, workers=None):
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    
+    def path(filename):
+        written.append(os.path.join(output_dir, filename))
+        return written[-1]
+    
+    if as_zip:
+        create_zip(roster, class_name, class_teacher, roster.ranks(), output=path("report_cards.zip"), workers=workers)
+    else:
+        pdf = build_pdf(roster, class_name, class_teacher, roster.ranks())
+        pdf.output(path("class_report_cards.pdf"))
+    
+    results = roster.frame.copy()
+    results["Class Rank"] = roster.ranks()
+    results.to_csv(path("class_results.csv"), index=False)
+    subject_statistics(roster.stats).to_csv(path("subject_statistics.csv"), index_label="Subject")
+    
+    summary = {
+        "class_name": class_name,
+        "class_teacher": class_teacher,
+        **class_metrics(roster.stats),
+        "Grades": roster.stats.grades,
+    }
+    with open(path("class_summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    
+    chart_buffer = create_class_performance_charts(roster)
+    if chart_buffer:
+        with open(path("class_charts.png"), "wb") as f:
+            f.write(chart_buffer.getvalue())
+    return written
+
+# Function to write reports for every class of a school, plus school-wide totals
+def write_school_reports(school, output_dir, as_zip=False, workers=None):
+    written = []
+    for (class_name, section), roster in school.classes.items():
+        class_dir = os.path.join(output_dir, re.sub(r"[^A-Za-z0-9_-]+", "_", f"{class_name}-{section}"))
+        written += write_reports(roster, class_dir, class_name, "", as_zip, workers)
+    
+    summary_path = os.path.join(output_dir, "school_summary.csv")
+    school.class_summary().to_csv(summary_path, index=False)
+    statistics_path = os.path.join(output_dir, "school_subject_statistics.csv")
+    school_stats = school.stats()
+    subject_statistics(school_stats).to_csv(statistics_path, index_label="Subject")
+    json_path = os.path.join(output_dir, "school_summary.json")
+    with open(json_path, "w") as f:
+        json.dump({"Classes": len(school.classes), **class_metrics(school_stats), "Grades": school_stats.grades}, f, indent=2)
+    return written + [summary_path, statistics_path, json_path]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate class report cards from a CSV or Parquet file.")
+    parser.add_argument("input", help="CSV or Parquet file with Name, Roll Number and subject marks")
+    parser.add_argument("-o", "--output", default="reports", help="directory to write into (default: reports)")
+    parser.add_argument("--class-name", default="")
+    parser.add_argument("--class-teacher", default="")
+    parser.add_argument("--zip", action="store_true", help="write one PDF per student into a ZIP, rendered in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --zip (default: all cores)")
+    parser.add_argument("--schema", help="JSON file with the subjects and grading to use (default: the five standard subjects)")
+    parser.add_argument("--by-class", action="store_true", help="split the file into classes using its Class and Section columns")
+    args = parser.parse_args(argv)
+    
+    try:
+        schema = GradingSchema.load(args.schema) if args.schema else DEFAULT_SCHEMA
+        if args.by_class:
+            students = load_school(args.input, schema, args.workers)
+        else:
+            students = load_roster(args.input, schema)
+    except (OSError, ValueError) as e:
+        print(f"Error processing file: {e}", file=sys.stderr)
+        return 1
+    
+    if args.by_class:
+        os.makedirs(args.output, exist_ok=True)
+        written = write_school_reports(students, args.output, args.zip, args.workers)
+    else:
+        written = write_reports(students, args.output, args.class_name, args.class_teacher, args.zip, args.workers)
+    print(f"Generated reports for {len(students)} students:")
+    for path in written:
+        print(f"  {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
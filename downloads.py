@@ -0,0 +1,44 @@
+import atexit
+import os
+import tempfile
+import time
+
+# Temporary files written for downloads, with the time each one was made
+class TempFiles:
+    def __init__(self, max_age=3600):
+        self.max_age = max_age
+        self._created = {}
+
+    def __len__(self):
+        return len(self._created)
+
+    # Function to create a tracked temporary file and return its path
+    def create(self, suffix=""):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+            path = tmp_file.name
+        self._created[path] = time.time()
+        return path
+
+    # Function to delete one tracked file
+    def remove(self, path):
+        self._created.pop(path, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # Function to delete files older than max_age seconds
+    def expire(self, now=None):
+        now = time.time() if now is None else now
+        for path, created in list(self._created.items()):
+            if now - created > self.max_age:
+                self.remove(path)
+
+    # Function to delete every tracked file
+    def clear(self):
+        for path in list(self._created):
+            self.remove(path)
+
+# Files created by this process; anything left over is removed at exit
+temp_files = TempFiles()
+atexit.register(temp_files.clear)
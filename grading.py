@@ -0,0 +1,146 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SUBJECTS = ["Math", "Physics", "Urdu", "English", "Computer"]
+
+# Grade bands, highest first: (minimum percentage, grade)
+DEFAULT_GRADE_BANDS = [
+    (80, "A+"),
+    (70, "A"),
+    (60, "B"),
+    (50, "C"),
+    (40, "F"),
+]
+
+# Marks are stored as 16-bit unsigned integers at most
+MAX_MARKS_LIMIT = 65535
+
+# Subjects, their maximum marks and weights, and the grade bands for a class
+# max_marks and weights may be a single number for every subject or a dict per subject.
+# Percentage is the weighted average of each subject's share of its maximum marks.
+class GradingSchema:
+    def __init__(self, subjects=DEFAULT_SUBJECTS, max_marks=100, weights=1,
+                 grade_bands=DEFAULT_GRADE_BANDS, fail_grade="Fail", pass_percentage=40):
+        self.subjects = list(subjects)
+        if not self.subjects or len(set(self.subjects)) != len(self.subjects):
+            raise ValueError("Subjects must be a non-empty list of distinct names.")
+        reserved = {"Name", "Roll Number", "Total", "Percentage", "Grade"} & set(self.subjects)
+        if reserved:
+            raise ValueError(f"Subject names clash with report columns: {', '.join(sorted(reserved))}")
+        
+        self.max_marks = _per_subject(max_marks, self.subjects, "max_marks")
+        self.weights = _per_subject(weights, self.subjects, "weights")
+        if any(not float(m).is_integer() or not 0 < m <= MAX_MARKS_LIMIT for m in self.max_marks.values()):
+            raise ValueError(f"Maximum marks must be whole numbers from 1 to {MAX_MARKS_LIMIT}.")
+        if any(w <= 0 for w in self.weights.values()):
+            raise ValueError("Weights must be positive.")
+        
+        self.grade_bands = sorted(((float(minimum), grade) for minimum, grade in grade_bands), reverse=True)
+        self.fail_grade = fail_grade
+        self.pass_percentage = pass_percentage
+        self.grades = [grade for _, grade in self.grade_bands] + [fail_grade]
+        if len(set(self.grades)) != len(self.grades):
+            raise ValueError("Grade names must be distinct.")
+        
+        self.max_total = int(sum(self.max_marks.values()))
+        self.pass_marks = {s: self.max_marks[s] * pass_percentage / 100 for s in self.subjects}
+        
+        # Lookup tables for grading: band boundaries ascending, and the grade for each slot between them
+        self._boundaries = np.array([minimum for minimum, _ in reversed(self.grade_bands)])
+        self._labels = np.array([fail_grade] + [grade for _, grade in reversed(self.grade_bands)], dtype=object)
+        
+        # With equal weights and maximums the percentage is simply Total / max_total,
+        # computed that way so results match the original grading to the last digit
+        weighted = np.array([self.weights[s] / self.max_marks[s] for s in self.subjects])
+        self._uniform = np.allclose(weighted, weighted[0])
+        self._factors = weighted / np.array([self.weights[s] for s in self.subjects]).sum() * 100
+
+    def __eq__(self, other):
+        return isinstance(other, GradingSchema) and self.to_dict() == other.to_dict()
+
+    # Columns an upload must have
+    @property
+    def input_columns(self):
+        return ["Name", "Roll Number"] + self.subjects
+
+    # Columns of a graded roster
+    @property
+    def columns(self):
+        return self.input_columns + ["Total", "Percentage", "Grade"]
+
+    # Smallest unsigned integer type that holds every subject's marks
+    @property
+    def mark_dtype(self):
+        return np.uint8 if max(self.max_marks.values()) <= np.iinfo(np.uint8).max else np.uint16
+
+    # Smallest unsigned integer type that holds the total
+    @property
+    def total_dtype(self):
+        return np.uint16 if self.max_total <= np.iinfo(np.uint16).max else np.uint32
+
+    # Function to grade a whole column of percentages with one sorted lookup
+    def grade(self, percentages):
+        percentages = np.asarray(percentages, dtype=float)
+        return self._labels[np.searchsorted(self._boundaries, percentages, side="right")]
+
+    # Function to calculate grade based on percentage
+    def calculate_grade(self, percentage):
+        return self.grade([percentage])[0]
+
+    # Function to flag marks that are blank, fractional, negative or above the subject's maximum
+    def invalid_marks(self, marks):
+        maximums = pd.Series(self.max_marks)
+        return marks.isna() | (marks < 0) | marks.gt(maximums) | (marks != marks.round())
+
+    # Function to compute Total, Percentage and Grade for every row of a marks table
+    def compute_results(self, df):
+        result = df[self.input_columns].copy()
+        result["Roll Number"] = result["Roll Number"].astype(str)
+        marks = result[self.subjects]
+        result["Total"] = marks.sum(axis=1)
+        # Percentages are worked out in float64 whatever type the marks arrived as,
+        # so a student gets the same percentage from every input path
+        if self._uniform:
+            result["Percentage"] = (result["Total"].astype(np.float64) / self.max_total) * 100
+        else:
+            result["Percentage"] = marks.to_numpy(dtype=float) @ self._factors
+        result["Grade"] = self.grade(result["Percentage"].to_numpy())
+        return result
+
+    def to_dict(self):
+        return {
+            "subjects": self.subjects,
+            "max_marks": self.max_marks,
+            "weights": self.weights,
+            "grade_bands": [[minimum, grade] for minimum, grade in self.grade_bands],
+            "fail_grade": self.fail_grade,
+            "pass_percentage": self.pass_percentage,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    # Function to read a schema from a JSON file with the same keys as to_dict
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+# Function to expand a single value into a value per subject, or check a dict covers every subject
+def _per_subject(value, subjects, name):
+    if not isinstance(value, dict):
+        return dict.fromkeys(subjects, value)
+    missing = [subject for subject in subjects if subject not in value]
+    if missing:
+        raise ValueError(f"{name} missing for: {', '.join(missing)}")
+    return {subject: value[subject] for subject in subjects}
+
+# The five-subject, out-of-100 schema the app has always used
+DEFAULT_SCHEMA = GradingSchema()
+
+# Function to calculate grade based on percentage, using the default schema
+def calculate_grade(percentage):
+    return DEFAULT_SCHEMA.calculate_grade(percentage)
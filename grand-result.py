@@ -1,19 +1,60 @@
+import functools
+import json
+import os
+import uuid
+from contextlib import contextmanager
+
 import streamlit as st
 import pandas as pd
-import base64
-from fpdf import FPDF
-import tempfile
-import os
-import io
-import numpy as np
-import matplotlib.pyplot as plt
+from grading import DEFAULT_SCHEMA, GradingSchema
+from roster import Roster
+from report_pdf import create_pdf, create_zip, warm_up as warm_up_pdf
+from downloads import temp_files
+from analytics import class_analytics
+from charts import create_class_performance_charts, student_radar_png, warm_up as warm_up_charts
+import ingest
+from storage import RosterStore, SharedClasses
+from school import School
+import profiling
+from jobs import FAILED, JobQueue
+
+# SQLite file where saved classes are kept
+DB_PATH = os.environ.get("REPORT_CARD_DB", "report_cards.db")
+
+# Grading schema for new classes: a JSON file named by REPORT_CARD_SCHEMA, or the default subjects
+SCHEMA_PATH = os.environ.get("REPORT_CARD_SCHEMA")
+APP_SCHEMA = GradingSchema.load(SCHEMA_PATH) if SCHEMA_PATH else DEFAULT_SCHEMA
+
+# Students shown per page in the sidebar list and the report card selector
+PAGE_SIZE = 50
+
+# Finished class chart images kept, one per roster version charted
+CHART_RESULTS = 16
 
 # Set page configuration
 st.set_page_config(page_title="Class Report Card Generator", layout="wide")
 
+# Opt-in timing of each rerun, shown in the sidebar and written to the profile log
+# (REPORT_CARD_PROFILE=1 for every session, or ?profile=1 for this one where the
+# operator allows it with REPORT_CARD_PROFILE_URL=1; memory is only traced for the former)
+profile_run = None
+if profiling.ENABLED or (profiling.URL_OPT_IN and st.query_params.get("profile") == "1"):
+    if 'profile_session' not in st.session_state:
+        st.session_state.profile_session = uuid.uuid4().hex[:12]
+        st.session_state.profile_history = []
+        st.session_state.profile_reruns = 0
+    # A rerun cut short by st.rerun() never reached the end of the script; log it now
+    if st.session_state.get("profile_run") is not None:
+        profiling.finish_run(st.session_state.profile_run)
+    st.session_state.profile_reruns += 1
+    profile_run = profiling.start_run(
+        "rerun", profiling.ENABLED, session=st.session_state.profile_session, rerun=st.session_state.profile_reruns
+    )
+    st.session_state.profile_run = profile_run
+
 # Initialize session state variables if they don't exist
 if 'students' not in st.session_state:
-    st.session_state.students = []
+    st.session_state.students = Roster(APP_SCHEMA)
 if 'show_report' not in st.session_state:
     st.session_state.show_report = False
 if 'class_name' not in st.session_state:
@@ -21,167 +62,145 @@ if 'class_name' not in st.session_state:
 if 'class_teacher' not in st.session_state:
     st.session_state.class_teacher = ""
 
-# Function to calculate grade based on percentage
-def calculate_grade(percentage):
-    if percentage >= 80:
-        return "A+"
-    elif percentage >= 70:
-        return "A"
-    elif percentage >= 60:
-        return "B"
-    elif percentage >= 50:
-        return "C"
-    elif percentage >= 40:
-        return "F"
+# Saved classes, loaded once per server process and shared by every session
+@st.cache_resource
+def shared_classes():
+    return SharedClasses(RosterStore(DB_PATH))
+
+classes = shared_classes()
+
+# Function to switch this session to a saved class; returns False if there is no such class
+def open_saved_class(class_name):
+    opened = classes.get(class_name)
+    if opened is None:
+        return False
+    st.session_state.students, st.session_state.class_teacher = opened
+    st.session_state.class_name = class_name
+    st.session_state.saved_class = class_name
+    st.query_params["class"] = class_name
+    return True
+
+# A saved class named in the URL is reopened after a browser refresh
+if 'saved_class' not in st.session_state:
+    st.session_state.saved_class = None
+    if "class" in st.query_params:
+        open_saved_class(st.query_params["class"])
+elif st.session_state.saved_class:
+    # Pick up the shared roster again in case it was reloaded from storage
+    opened = classes.get(st.session_state.saved_class)
+    if opened is None:
+        st.session_state.saved_class = None
     else:
-        return "Fail"
+        st.session_state.students = opened[0]
 
-# Function to create PDF report card
-def create_pdf(students, class_name="", class_teacher=""):
-    pdf = FPDF()
-    
-    for student in students:
-        pdf.add_page()
-        
-        # Set up the PDF
-        pdf.set_font("Arial", "B", 16)
-        pdf.cell(190, 10, "Student Report Card", 0, 1, "C")
-        
-        # Class details if provided
-        if class_name:
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(190, 10, f"Class: {class_name}", 0, 1, "C")
-        if class_teacher:
-            pdf.set_font("Arial", "", 12)
-            pdf.cell(190, 10, f"Class Teacher: {class_teacher}", 0, 1, "C")
-            
-        pdf.line(10, pdf.get_y() + 5, 200, pdf.get_y() + 5)
-        pdf.cell(190, 10, "", 0, 1)  # Add some space
-        
-        # Student details
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(50, 10, "Name:", 0, 0)
-        pdf.set_font("Arial", "", 12)
-        pdf.cell(140, 10, student["Name"], 0, 1)
-        
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(50, 10, "Roll Number:", 0, 0)
-        pdf.set_font("Arial", "", 12)
-        pdf.cell(140, 10, student["Roll Number"], 0, 1)
-        
-        # Subject marks
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(190, 10, "", 0, 1)
-        pdf.cell(190, 10, "Subject Marks", 0, 1)
-        
-        # Table header
-        pdf.set_fill_color(200, 200, 200)
-        pdf.cell(95, 10, "Subject", 1, 0, "C", True)
-        pdf.cell(95, 10, "Marks", 1, 1, "C", True)
-        
-        # Table data
-        pdf.set_font("Arial", "", 12)
-        subjects = ["Math", "Physics", "Urdu", "English", "Computer"]
-        for subject in subjects:
-            pdf.cell(95, 10, subject, 1, 0)
-            pdf.cell(95, 10, str(student[subject]), 1, 1)
-        
-        # Total
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(95, 10, "Total", 1, 0)
-        pdf.cell(95, 10, str(student["Total"]), 1, 1)
-        
-        # Percentage and Grade
-        pdf.cell(190, 10, "", 0, 1)
-        pdf.cell(50, 10, "Percentage:", 0, 0)
-        pdf.set_font("Arial", "", 12)
-        pdf.cell(140, 10, f"{student['Percentage']:.2f}%", 0, 1)
-        
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(50, 10, "Grade:", 0, 0)
-        pdf.set_font("Arial", "", 12)
-        pdf.cell(140, 10, student["Grade"], 0, 1)
-        
-        # Class Rank if more than one student
-        if len(students) > 1:
-            # Sort students by percentage to determine rank
-            sorted_students = sorted(students, key=lambda x: x['Percentage'], reverse=True)
-            rank = [i+1 for i, s in enumerate(sorted_students) if s['Roll Number'] == student['Roll Number']][0]
-            
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(50, 10, "Class Rank:", 0, 0)
-            pdf.set_font("Arial", "", 12)
-            pdf.cell(140, 10, f"{rank} out of {len(students)}", 0, 1)
-        
-        # Footer
-        pdf.set_y(-30)
-        pdf.set_font("Arial", "I", 8)
-        pdf.cell(0, 10, "This is an automatically generated report card.", 0, 0, "C")
-    
-    # Save the PDF to a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        pdf_path = tmp_file.name
-        
-    pdf.output(pdf_path)
-    return pdf_path
-
-# Function to create a download link for the PDF
-def get_pdf_download_link(pdf_path, filename):
-    with open(pdf_path, "rb") as f:
-        pdf_bytes = f.read()
-    b64_pdf = base64.b64encode(pdf_bytes).decode()
-    href = f'<a href="data:application/pdf;base64,{b64_pdf}" download="{filename}">Download PDF</a>'
-    return href
-
-# Function to create class performance charts
-def create_class_performance_charts(students):
-    if not students:
+# Context manager for changing the roster; changes to a saved class are written to storage
+@contextmanager
+def editing_roster():
+    if st.session_state.saved_class:
+        with classes.editing(st.session_state.saved_class) as roster:
+            yield roster
+    else:
+        yield st.session_state.students
+
+# Report cards and charts are generated in the background, shared by every session;
+# jobs are kept as long as the temporary files they write
+@st.cache_resource
+def job_queue():
+    return JobQueue(max_age=temp_files.max_age, limits={"charts": CHART_RESULTS})
+
+jobs = job_queue()
+
+# Downloads this session has asked for: slot -> job id
+if 'downloads' not in st.session_state:
+    st.session_state.downloads = {}
+
+# Background work: the class charts as PNG bytes
+def class_charts_png(students, progress=None):
+    chart_buffer = create_class_performance_charts(students)
+    return chart_buffer.getvalue() if chart_buffer else None
+
+# Background work: load the chart and PDF libraries, which are only imported on first use
+def warm_up_renderers(progress=None):
+    warm_up_charts()
+    warm_up_pdf()
+
+# Warm-up runs once per server process
+@st.cache_resource
+def start_warm_up():
+    return jobs.submit(("warm-up",), warm_up_renderers, label="Loading chart and PDF libraries")
+
+# School-wide totals for the saved classes graded with a schema, shared by every session
+# Keyed by every saved class's version, so it is only recomputed after a class changes;
+# classes are added up from their stored results rather than loaded as rosters
+@st.cache_resource(max_entries=8, hash_funcs={GradingSchema: lambda schema: json.dumps(schema.to_dict())})
+def school_overview(versions, schema):
+    school = School()
+    for saved_name, _ in versions:
+        if classes.store.class_schema(saved_name) == schema:
+            stats = classes.stats(saved_name)
+            if stats is not None:
+                school.add_totals((saved_name, ""), stats)
+    return school
+
+# Function to read a finished download when its save button is clicked
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+# Progress of a running job, refreshed on its own without rerunning the page;
+# the page reruns once the job has finished so its result can be shown
+@st.fragment(run_every=0.5)
+def job_progress(job_id):
+    job = jobs.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    st.progress(job.progress, text=f"{job.label}... {job.progress:.0%}")
+
+# Function to show a background job: progress while it runs, an error if it failed,
+# and its result once it is done (None until then)
+def job_result(job):
+    if not job.done:
+        job_progress(job.id)
         return None
-    
-    # Create a DataFrame for analysis
-    df = pd.DataFrame(students)
-    
-    # Create a figure with multiple subplots
-    fig, axs = plt.subplots(2, 2, figsize=(12, 10))
-    
-    # 1. Grade Distribution
-    grade_counts = df['Grade'].value_counts().sort_index()
-    axs[0, 0].bar(grade_counts.index, grade_counts.values, color='skyblue')
-    axs[0, 0].set_title('Grade Distribution')
-    axs[0, 0].set_xlabel('Grade')
-    axs[0, 0].set_ylabel('Number of Students')
-    
-    # 2. Subject Performance
-    subjects = ['Math', 'Physics', 'Urdu', 'English', 'Computer']
-    avg_marks = [df[subject].mean() for subject in subjects]
-    axs[0, 1].bar(subjects, avg_marks, color='lightgreen')
-    axs[0, 1].set_title('Average Marks by Subject')
-    axs[0, 1].set_xlabel('Subject')
-    axs[0, 1].set_ylabel('Average Marks')
-    axs[0, 1].set_ylim(0, 100)
-    
-    # 3. Percentage Distribution
-    axs[1, 0].hist(df['Percentage'], bins=10, color='salmon', edgecolor='black')
-    axs[1, 0].set_title('Percentage Distribution')
-    axs[1, 0].set_xlabel('Percentage')
-    axs[1, 0].set_ylabel('Number of Students')
-    
-    # 4. Top 5 Students
-    top_students = df.sort_values('Percentage', ascending=False).head(5)
-    axs[1, 1].barh(top_students['Name'], top_students['Percentage'], color='gold')
-    axs[1, 1].set_title('Top 5 Students')
-    axs[1, 1].set_xlabel('Percentage')
-    axs[1, 1].set_ylabel('Student Name')
-    axs[1, 1].invert_yaxis()  # To have the highest at the top
-    
-    plt.tight_layout()
-    
-    # Convert plot to image
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    
-    return buf
+    if job.status == FAILED:
+        st.error(f"{job.label} failed: {job.error}")
+        return None
+    return job.result
+
+# Function to identify a download of the open class; the same request for an
+# unchanged class maps to the same job
+def download_key(slot):
+    return (slot, st.session_state.students.version, st.session_state.class_name, st.session_state.class_teacher)
+
+# Function to start generating a download in the background, keyed by download_key(slot)
+# students defaults to a snapshot of the whole class, ranked
+def start_download(slot, label, func, students=None, **kwargs):
+    roster = st.session_state.students
+    if students is None:
+        students = roster.snapshot()
+        kwargs["ranks"] = students.ranks()
+    job = jobs.submit(
+        download_key(slot), func, students, label=label,
+        class_name=st.session_state.class_name,
+        class_teacher=st.session_state.class_teacher,
+        schema=roster.schema,
+        **kwargs
+    )
+    st.session_state.downloads[slot] = job.id
+
+# Function to show this session's download in slot until the class changes:
+# progress while it is generated, then a button to save it
+def show_download(slot, label, file_name, mime):
+    job = jobs.get(st.session_state.downloads.get(slot))
+    if job is None or job.key != download_key(slot):
+        st.session_state.downloads.pop(slot, None)
+        return
+    path = job_result(job)
+    if path:
+        st.download_button(label, functools.partial(read_file, path), file_name=file_name, mime=mime, key=f"save_{slot}")
+
+# Subjects and grading of the class currently open
+schema = st.session_state.students.schema
 
 # Title and description
 st.title("Class Report Card Generator")
@@ -191,7 +210,7 @@ st.markdown("Generate report cards for an entire class of students.")
 tab1, tab2, tab3 = st.tabs(["Individual Entry", "Bulk Upload", "Class Analytics"])
 
 # Tab 1: Individual Student Entry
-with tab1:
+with tab1, profiling.stage("Individual Entry tab"):
     # Class information
     col1, col2 = st.columns(2)
     with col1:
@@ -211,18 +230,15 @@ with tab1:
         name = st.text_input("Student Name")
         roll_number = st.text_input("Roll Number")
         
-        # Subject marks input with validation
-        st.subheader("Enter Marks (0-100)")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            math = st.number_input("Math", min_value=0, max_value=100, step=1)
-            physics = st.number_input("Physics", min_value=0, max_value=100, step=1)
-            urdu = st.number_input("Urdu", min_value=0, max_value=100, step=1)
-        
-        with col2:
-            english = st.number_input("English", min_value=0, max_value=100, step=1)
-            computer = st.number_input("Computer", min_value=0, max_value=100, step=1)
+        # Subject marks input with validation, split over two columns
+        st.subheader("Enter Marks")
+        columns = st.columns(2)
+        half = -(-len(schema.subjects) // 2)
+        marks = {}
+        for j, subject in enumerate(schema.subjects):
+            with columns[j // half]:
+                max_mark = int(schema.max_marks[subject])
+                marks[subject] = st.number_input(f"{subject} (0-{max_mark})", min_value=0, max_value=max_mark, step=1)
         
         # Submit button
         submitted = st.form_submit_button("Add Student")
@@ -230,171 +246,123 @@ with tab1:
         if submitted:
             if name and roll_number:
                 # Check if roll number already exists
-                existing_roll_numbers = [s["Roll Number"] for s in st.session_state.students]
-                if roll_number in existing_roll_numbers:
+                if roll_number in st.session_state.students:
                     st.error(f"Roll Number {roll_number} already exists. Please use a unique roll number.")
                 else:
-                    # Calculate total and percentage
-                    total_marks = math + physics + urdu + english + computer
-                    percentage = (total_marks / 500) * 100
-                    grade = calculate_grade(percentage)
-                    
-                    # Create student record
+                    # Create student record; the roster fills in Total, Percentage and Grade
                     student = {
                         "Name": name,
                         "Roll Number": roll_number,
-                        "Math": math,
-                        "Physics": physics,
-                        "Urdu": urdu,
-                        "English": english,
-                        "Computer": computer,
-                        "Total": total_marks,
-                        "Percentage": percentage,
-                        "Grade": grade
+                        **marks
                     }
                     
-                    # Add to session state
-                    st.session_state.students.append(student)
-                    st.success(f"Record of {name} inserted successfully!")
+                    # Add to the class; a saved class may have gained the same roll number
+                    # from another session since this one last looked
+                    try:
+                        with editing_roster() as roster:
+                            roster.add(student)
+                    except ValueError as e:
+                        st.error(f"Could not add {name}: {e}")
+                    else:
+                        st.success(f"Record of {name} inserted successfully!")
             else:
                 st.error("Please enter both Name and Roll Number.")
 
 # Tab 2: Bulk Upload
-with tab2:
+with tab2, profiling.stage("Bulk Upload tab"):
     st.subheader("Upload Student Data")
-    st.markdown("""
-    Upload a CSV file with student data. The CSV should have the following columns:
-    - Name
-    - Roll Number
-    - Math
-    - Physics
-    - Urdu
-    - English
-    - Computer
-    """)
+    st.markdown(
+        "Upload a CSV file with student data. The CSV should have the following columns:\n"
+        + "\n".join(f"- {column}" for column in schema.input_columns)
+    )
     
-    # Sample data download
+    # Sample data download, with example scores scaled to each subject's maximum marks
+    sample_scores = [[85, 92, 78], [76, 88, 65], [92, 79, 81], [88, 94, 72], [95, 90, 85]]
     sample_data = pd.DataFrame({
         'Name': ['John Doe', 'Jane Smith', 'Bob Johnson'],
         'Roll Number': ['001', '002', '003'],
-        'Math': [85, 92, 78],
-        'Physics': [76, 88, 65],
-        'Urdu': [92, 79, 81],
-        'English': [88, 94, 72],
-        'Computer': [95, 90, 85]
+        **{
+            subject: [round(score * schema.max_marks[subject] / 100) for score in sample_scores[j % len(sample_scores)]]
+            for j, subject in enumerate(schema.subjects)
+        }
     })
     
-    # Create a download link for sample CSV
-    csv_buffer = io.StringIO()
-    sample_data.to_csv(csv_buffer, index=False)
-    csv_str = csv_buffer.getvalue()
-    b64_csv = base64.b64encode(csv_str.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64_csv}" download="sample_student_data.csv">Download Sample CSV</a>'
-    st.markdown(href, unsafe_allow_html=True)
+    # Download button for sample CSV
+    st.download_button(
+        "Download Sample CSV",
+        sample_data.to_csv(index=False),
+        file_name="sample_student_data.csv",
+        mime="text/csv"
+    )
     
     # File uploader
     uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
     
     if uploaded_file is not None:
         try:
-            # Read the CSV file
-            df = pd.read_csv(uploaded_file)
-            
-            # Validate columns
-            required_columns = ['Name', 'Roll Number', 'Math', 'Physics', 'Urdu', 'English', 'Computer']
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            # Check the header before reading any data
+            missing_columns = ingest.missing_columns(uploaded_file, schema)
             
             if missing_columns:
                 st.error(f"Missing columns in CSV: {', '.join(missing_columns)}")
             else:
                 # Preview the data
                 st.subheader("Data Preview")
-                st.dataframe(df.head())
+                st.dataframe(ingest.preview(uploaded_file, schema))
                 
-                # Process and add students
+                # Process and add students, streaming the file in chunks
                 if st.button("Import Students"):
-                    # Check for duplicate roll numbers
-                    existing_roll_numbers = [s["Roll Number"] for s in st.session_state.students]
-                    new_roll_numbers = df['Roll Number'].astype(str).tolist()
-                    duplicates = [roll for roll in new_roll_numbers if roll in existing_roll_numbers]
-                    
-                    if duplicates:
-                        st.error(f"Duplicate roll numbers found: {', '.join(duplicates)}. Please ensure all roll numbers are unique.")
-                    else:
-                        # Process each row
-                        imported_count = 0
-                        for _, row in df.iterrows():
-                            # Calculate total and percentage
-                            total_marks = row['Math'] + row['Physics'] + row['Urdu'] + row['English'] + row['Computer']
-                            percentage = (total_marks / 500) * 100
-                            grade = calculate_grade(percentage)
-                            
-                            # Create student record
-                            student = {
-                                "Name": row['Name'],
-                                "Roll Number": str(row['Roll Number']),
-                                "Math": row['Math'],
-                                "Physics": row['Physics'],
-                                "Urdu": row['Urdu'],
-                                "English": row['English'],
-                                "Computer": row['Computer'],
-                                "Total": total_marks,
-                                "Percentage": percentage,
-                                "Grade": grade
-                            }
-                            
-                            # Add to session state
-                            st.session_state.students.append(student)
-                            imported_count += 1
-                        
-                        st.success(f"Successfully imported {imported_count} students!")
+                    progress_bar = st.progress(0.0, text="Importing students...")
+                    with editing_roster() as roster:
+                        imported_count = ingest.ingest_csv(
+                            uploaded_file,
+                            roster,
+                            progress=lambda rows, fraction: progress_bar.progress(fraction, text=f"Imported {rows} students")
+                        )
+                    st.success(f"Successfully imported {imported_count} students!")
+        except ValueError as e:
+            st.error(f"{e} Nothing was imported.")
         except Exception as e:
             st.error(f"Error processing file: {str(e)}")
 
 # Tab 3: Class Analytics
-with tab3:
+with tab3, profiling.stage("Class Analytics tab"):
     if st.session_state.students:
         st.subheader("Class Performance Analytics")
         
-        # Create DataFrame for analysis
-        df = pd.DataFrame(st.session_state.students)
+        # Class statistics, kept up to date by the roster as students are added
+        roster = st.session_state.students
+        stats = class_analytics(roster.stats)
+        metrics = stats["metrics"]
         
         # Display class statistics
         st.markdown("### Class Statistics")
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Students", len(df))
+            st.metric("Total Students", metrics["Total Students"])
         
         with col2:
-            st.metric("Class Average", f"{df['Percentage'].mean():.2f}%")
+            st.metric("Class Average", f"{metrics['Class Average']:.2f}%")
         
         with col3:
-            st.metric("Highest Score", f"{df['Percentage'].max():.2f}%")
+            st.metric("Highest Score", f"{metrics['Highest Score']:.2f}%")
         
         with col4:
-            st.metric("Lowest Score", f"{df['Percentage'].min():.2f}%")
+            st.metric("Lowest Score", f"{metrics['Lowest Score']:.2f}%")
         
         # Display charts
         st.markdown("### Performance Charts")
-        chart_buffer = create_class_performance_charts(st.session_state.students)
-        if chart_buffer:
-            st.image(chart_buffer, use_column_width=True)
+        # The snapshot is only taken when this version's charts have not been asked for yet
+        charts_key = ("charts", roster.version)
+        charts_job = jobs.find(charts_key) or jobs.submit(charts_key, class_charts_png, roster.snapshot(), label="Drawing charts")
+        chart_png = job_result(charts_job)
+        if chart_png:
+            st.image(chart_png, use_column_width=True)
         
         # Display subject-wise statistics
         st.markdown("### Subject-wise Statistics")
-        subjects = ['Math', 'Physics', 'Urdu', 'English', 'Computer']
-        subject_stats = {}
-        
-        for subject in subjects:
-            subject_stats[subject] = {
-                'Average': df[subject].mean(),
-                'Highest': df[subject].max(),
-                'Lowest': df[subject].min(),
-                'Pass Rate': (df[subject] >= 40).mean() * 100  # Assuming 40 is pass mark
-            }
-        
-        subject_df = pd.DataFrame(subject_stats).T
+        subject_df = stats["subjects"]
         st.dataframe(subject_df.style.format({
             'Average': '{:.2f}',
             'Pass Rate': '{:.2f}%'
@@ -402,22 +370,80 @@ with tab3:
         
         # Top performers
         st.markdown("### Top Performers")
-        top_students = df.sort_values('Percentage', ascending=False).head(5)
-        st.dataframe(top_students[['Name', 'Roll Number', 'Total', 'Percentage', 'Grade']])
+        st.dataframe(stats["top"])
     else:
         st.info("No student data available. Please add students using Individual Entry or Bulk Upload.")
+    
+    # School-wide view over every saved class, added up from each class's running totals
+    # It reads every saved class, so it is only worked out when asked for, and then
+    # once per set of stored class versions
+    show_school = st.toggle("Show school overview", help="Combined figures for every saved class graded like this one")
+    school = school_overview(classes.store.class_versions(), schema) if show_school else None
+    if school is not None and len(school.totals) < 2:
+        st.info("The school overview needs at least two saved classes graded the same way as this one.")
+    elif school is not None:
+        st.subheader("School Overview")
+        
+        school_stats = class_analytics(school.stats())
+        school_metrics = school_stats["metrics"]
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Students", school_metrics["Total Students"])
+        with col2:
+            st.metric("School Average", f"{school_metrics['Class Average']:.2f}%")
+        with col3:
+            st.metric("Highest Score", f"{school_metrics['Highest Score']:.2f}%")
+        with col4:
+            st.metric("Lowest Score", f"{school_metrics['Lowest Score']:.2f}%")
+        
+        st.markdown("### Classes")
+        st.dataframe(school.class_summary().drop(columns="Section").style.format({
+            'Average': '{:.2f}',
+            'Highest': '{:.2f}',
+            'Lowest': '{:.2f}',
+            'Pass Rate': '{:.2f}%'
+        }), hide_index=True)
+        
+        st.markdown("### Subject-wise Statistics")
+        st.dataframe(school_stats["subjects"].style.format({
+            'Average': '{:.2f}',
+            'Pass Rate': '{:.2f}%'
+        }))
+        
+        st.markdown("### Top Performers in School")
+        st.dataframe(school.top_performers().drop(columns="Section"), hide_index=True)
 
 # Sidebar for student list and actions
-with st.sidebar:
+with st.sidebar, profiling.stage("Sidebar"):
     st.header("Student List")
     
     if st.session_state.students:
         # Display student count
         st.info(f"Total Students: {len(st.session_state.students)}")
         
+        # Search and page through the student list; only the current page is sent to the browser
+        search = st.text_input("Search by name or roll number", key="roster_search")
+        matches = st.session_state.students.search(search)
+        page_count = max(1, -(-len(matches) // PAGE_SIZE))
+        if st.session_state.get("roster_page", 1) > page_count:
+            st.session_state.roster_page = page_count
+        page = 1
+        if page_count > 1:
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="roster_page")
+        page_positions = matches[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+        
         # Display student list
-        for i, student in enumerate(st.session_state.students):
-            st.markdown(f"**{i+1}. {student['Name']}** (Roll No: {student['Roll Number']})")
+        roster_df = st.session_state.students.frame
+        names = roster_df["Name"].to_numpy()[page_positions]
+        roll_numbers = roster_df["Roll Number"].to_numpy()[page_positions]
+        if len(page_positions):
+            st.markdown("  \n".join(
+                f"**{i+1}. {name}** (Roll No: {roll_number})"
+                for i, name, roll_number in zip(page_positions, names, roll_numbers)
+            ))
+        else:
+            st.markdown("No matching students.")
         
         # Actions
         st.header("Actions")
@@ -426,43 +452,59 @@ with st.sidebar:
         if st.button("Generate All Report Cards"):
             st.session_state.show_report = True
         
-        # Download all report cards as PDF
+        # Download all report cards as PDF, generated in the background
         if st.button("Download All Report Cards"):
-            pdf_path = create_pdf(
-                st.session_state.students, 
-                class_name=st.session_state.class_name,
-                class_teacher=st.session_state.class_teacher
-            )
-            st.markdown(get_pdf_download_link(pdf_path, "class_report_cards.pdf"), unsafe_allow_html=True)
-            st.session_state.temp_pdf_path = pdf_path
+            start_download("class_pdf", "Generating report cards", create_pdf)
+        show_download("class_pdf", "Save PDF", "class_report_cards.pdf", "application/pdf")
+        
+        # Download one PDF per student as a ZIP, rendered in parallel in the background
+        if st.button("Download All as ZIP"):
+            start_download("class_zip", "Generating ZIP", create_zip)
+        show_download("class_zip", "Save ZIP", "class_report_cards.zip", "application/zip")
         
         # Clear all data
         if st.button("Clear All Data"):
-            # Clean up any temporary PDF files
-            for key in list(st.session_state.keys()):
-                if key.startswith("temp_pdf_path"):
-                    try:
-                        os.remove(st.session_state[key])
-                    except:
-                        pass
-            
-            st.session_state.students = []
+            with editing_roster() as roster:
+                roster.clear()
             st.session_state.show_report = False
-            st.experimental_rerun()
+            st.rerun()
     else:
         st.info("No students added yet.")
-
-# Display report cards if requested
-if st.session_state.show_report and st.session_state.students:
-    st.header("Student Report Cards")
     
-    # Create tabs for each student
-    student_tabs = st.tabs([f"{s['Name']} ({s['Roll Number']})" for s in st.session_state.students])
+    # Saved classes survive refreshes and restarts, and are shared between sessions
+    st.header("Saved Classes")
+    if st.session_state.saved_class:
+        st.caption(f"Changes are saved automatically to '{st.session_state.saved_class}'.")
+    
+    if st.button("Save Class"):
+        if st.session_state.class_name:
+            classes.save(st.session_state.class_name, st.session_state.class_teacher, st.session_state.students)
+            open_saved_class(st.session_state.class_name)
+            st.rerun()
+        else:
+            st.error("Please enter a Class Name before saving.")
     
-    for i, tab in enumerate(student_tabs):
-        student = st.session_state.students[i]
+    saved_class_names = classes.store.class_names()
+    if saved_class_names:
+        class_to_open = st.selectbox("Saved class", saved_class_names)
+        if st.button("Open Class"):
+            open_saved_class(class_to_open)
+            st.session_state.show_report = False
+            st.rerun()
+
+# Display report cards if requested
+with profiling.stage("Report cards"):
+    if st.session_state.show_report and st.session_state.students:
+        st.header("Student Report Cards")
         
-        with tab:
+        # One report card at a time, chosen from the students on the current sidebar page
+        class_ranks = st.session_state.students.ranks()
+        labels = {int(i): f"{name} ({roll_number})" for i, name, roll_number in zip(page_positions, names, roll_numbers)}
+        
+        if labels:
+            i = st.selectbox("Student", list(labels), format_func=labels.get, key="report_student")
+            student = st.session_state.students[i]
+            
             col1, col2 = st.columns([2, 1])
             
             with col1:
@@ -477,15 +519,8 @@ if st.session_state.show_report and st.session_state.students:
                 
                 # Create a table for subject marks
                 marks_data = {
-                    "Subject": ["Math", "Physics", "Urdu", "English", "Computer", "Total"],
-                    "Marks": [
-                        student["Math"], 
-                        student["Physics"], 
-                        student["Urdu"], 
-                        student["English"], 
-                        student["Computer"],
-                        student["Total"]
-                    ]
+                    "Subject": schema.subjects + ["Total"],
+                    "Marks": [student[subject] for subject in schema.subjects] + [student["Total"]]
                 }
                 marks_df = pd.DataFrame(marks_data)
                 st.table(marks_df)
@@ -495,46 +530,58 @@ if st.session_state.show_report and st.session_state.students:
                 st.markdown(f"**Grade:** {student['Grade']}")
                 
                 # Class Rank
-                sorted_students = sorted(st.session_state.students, key=lambda x: x['Percentage'], reverse=True)
-                rank = [i+1 for i, s in enumerate(sorted_students) if s['Roll Number'] == student['Roll Number']][0]
+                rank = class_ranks[i]
                 st.markdown(f"**Class Rank:** {rank} out of {len(st.session_state.students)}")
             
             with col2:
                 # Individual PDF download button
+                student_slot = f"student_{student['Roll Number']}"
                 if st.button(f"Download PDF", key=f"pdf_{i}"):
-                    pdf_path = create_pdf(
-                        [student], 
-                        class_name=st.session_state.class_name,
-                        class_teacher=st.session_state.class_teacher
-                    )
-                    st.markdown(get_pdf_download_link(pdf_path, f"{student['Name']}_report_card.pdf"), unsafe_allow_html=True)
-                    st.session_state[f"temp_pdf_path_{i}"] = pdf_path
+                    start_download(student_slot, "Generating report card", create_pdf, students=[student])
+                show_download(student_slot, "Save PDF", f"{student['Name']}_report_card.pdf", "application/pdf")
                 
                 # Subject performance chart
                 st.markdown("### Subject Performance")
                 
-                # Create radar chart for subject performance
-                subjects = ["Math", "Physics", "Urdu", "English", "Computer"]
-                subject_values = [student[subject] for subject in subjects]
-                
-                # Create a radar chart
-                angles = np.linspace(0, 2*np.pi, len(subjects), endpoint=False).tolist()
-                angles += angles[:1]  # Close the loop
-                
-                subject_values += subject_values[:1]  # Close the loop
-                
-                fig, ax = plt.subplots(figsize=(4, 4), subplot_kw=dict(polar=True))
-                ax.plot(angles, subject_values, 'o-', linewidth=2)
-                ax.fill(angles, subject_values, alpha=0.25)
-                ax.set_thetagrids(np.degrees(angles[:-1]), subjects)
-                ax.set_ylim(0, 100)
-                ax.grid(True)
-                
-                st.pyplot(fig)
-
-# Clean up temporary files when the app is closed
-if hasattr(st.session_state, "temp_pdf_path"):
-    try:
-        os.remove(st.session_state.temp_pdf_path)
-    except:
-        pass
\ No newline at end of file
+                # Radar chart for subject performance, cached by the student's marks
+                st.image(student_radar_png(student, schema))
+
+# Remove temporary download files, and the jobs that wrote them, once they have outlived their use
+temp_files.expire()
+jobs.expire()
+
+# Started after the page has been drawn, so the first page does not wait for it
+start_warm_up()
+
+# Profile of this rerun: stages slowest first, plus the time of recent reruns
+if profile_run is not None:
+    profiling.finish_run(profile_run)
+    history = st.session_state.profile_history
+    history.append(profile_run.seconds * 1000)
+    with st.sidebar.expander("Performance", expanded=True):
+        st.caption(f"Rerun {st.session_state.profile_reruns} took {history[-1]:.0f} ms")
+        stages = pd.DataFrame(profile_run.rows(), columns=["stage", "calls", "seconds", "net_bytes", "peak_bytes"])
+        table = pd.DataFrame({
+            "Stage": stages["stage"],
+            "Calls": stages["calls"],
+            "ms": stages["seconds"] * 1000,
+            "Net KiB": stages["net_bytes"] / 1024,
+            "Peak KiB": stages["peak_bytes"] / 1024,
+        })
+        if not profile_run.trace_memory:
+            table = table.drop(columns=["Net KiB", "Peak KiB"])
+        st.dataframe(table.style.format({"ms": "{:.1f}", "Net KiB": "{:.0f}", "Peak KiB": "{:.0f}"}), hide_index=True)
+        st.line_chart(pd.Series(history[-50:], name="Rerun ms"))
+        
+        # Background work this session started, profiled as runs of their own
+        job_runs = [
+            job.profile for job in jobs
+            if job.profile is not None and job.profile.seconds is not None
+            and job.profile.fields.get("session") == st.session_state.profile_session
+        ]
+        if job_runs:
+            st.caption("Background jobs")
+            st.dataframe(pd.DataFrame([
+                {"Job": run.fields["job"], "Stage": row["stage"], "Calls": row["calls"], "ms": row["seconds"] * 1000}
+                for run in job_runs[-10:] for row in [{"stage": "(total)", "calls": 1, "seconds": run.seconds}] + run.rows()
+            ]).style.format({"ms": "{:.1f}"}), hide_index=True)
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from grading import DEFAULT_SCHEMA
+from profiling import profiled
+
+# Rows read from the CSV at a time; memory use depends on this, not on the file size
+CHUNK_SIZE = 50_000
+
+# Marks are read as float32 so blanks and decimals can be reported by row;
+# the roster stores them as small unsigned integers once a chunk has been checked
+def csv_dtypes(schema):
+    return {
+        "Name": str,
+        "Roll Number": str,
+        **{subject: np.float32 for subject in schema.subjects},
+    }
+
+# Rows listed per problem in an error message
+MAX_REPORTED_ROWS = 10
+
+# Function to read only the header of a CSV and list the required columns it lacks
+def missing_columns(source, schema=DEFAULT_SCHEMA):
+    header = pd.read_csv(source, nrows=0).columns
+    _rewind(source)
+    return [col for col in schema.input_columns if col not in header]
+
+# Function to read the first few rows of a CSV for a preview
+def preview(source, schema=DEFAULT_SCHEMA, rows=5):
+    df = pd.read_csv(source, nrows=rows, usecols=schema.input_columns, dtype=csv_dtypes(schema))
+    _rewind(source)
+    return df
+
+# Function to move a file object back to the start so it can be read again
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+# Function to list items in an error message, at most MAX_REPORTED_ROWS of them
+def describe(items):
+    items = list(items)
+    listed = ", ".join(str(item) for item in items[:MAX_REPORTED_ROWS])
+    if len(items) > MAX_REPORTED_ROWS:
+        listed += f" and {len(items) - MAX_REPORTED_ROWS} more"
+    return listed
+
+# Function to get the line numbers of the rows a mask picks out; in a CSV the header
+# is line 1, so the first row of data is line 2
+def row_lines(mask, chunk, first_line=2):
+    return (chunk.index[mask.to_numpy()] + first_line).tolist()
+
+# Function to describe problem rows by line number
+def describe_rows(mask, chunk, first_line=2):
+    return describe(row_lines(mask, chunk, first_line))
+
+# Function to find the rows of a chunk that cannot be imported
+# Returns the line numbers of (rows missing a Name or Roll Number, rows with invalid marks)
+def problem_lines(chunk, schema=DEFAULT_SCHEMA, first_line=2):
+    missing = chunk["Name"].isna() | chunk["Roll Number"].isna()
+    invalid = schema.invalid_marks(chunk[schema.subjects]).any(axis=1)
+    return row_lines(missing, chunk, first_line), row_lines(invalid, chunk, first_line)
+
+# Function to turn problems found in an upload into error messages
+def _messages(missing, invalid, in_class=(), repeated=()):
+    errors = []
+    if missing:
+        errors.append(f"Name or Roll Number missing on lines {describe(missing)}")
+    if invalid:
+        errors.append(f"Marks must be whole numbers between 0 and each subject's maximum on lines {describe(invalid)}")
+    if in_class:
+        errors.append(f"Roll numbers already in the class: {describe(sorted(in_class))}")
+    if repeated:
+        errors.append(f"Roll numbers repeated in the CSV: {describe(sorted(repeated))}")
+    return errors
+
+# Function to check one chunk and return a list of problems found in it
+# first_line is the line number of the table's first row, for tables not read from a CSV
+def validate_chunk(chunk, schema=DEFAULT_SCHEMA, first_line=2):
+    return _messages(*problem_lines(chunk, schema, first_line))
+
+# Function to stream a CSV into the roster chunk by chunk
+# progress, if given, is called as progress(rows_imported, fraction_of_file_read).
+# The header is checked before any data is read. Once a chunk has a problem nothing
+# more is added, but the rest of the file is still checked so that every problem is
+# reported in one error; the students added by this call are then removed again,
+# so an upload is all or nothing.
+@profiled
+def ingest_csv(source, roster, chunk_size=CHUNK_SIZE, progress=None):
+    schema = roster.schema
+    absent = missing_columns(source, schema)
+    if absent:
+        raise ValueError(f"Missing columns in CSV: {', '.join(absent)}")
+    
+    total_bytes = _size(source)
+    start = len(roster)
+    missing, invalid, in_class, repeated = [], [], set(), set()
+    seen = set()
+    try:
+        reader = pd.read_csv(source, usecols=schema.input_columns, dtype=csv_dtypes(schema), chunksize=chunk_size)
+        for chunk in reader:
+            chunk_missing, chunk_invalid = problem_lines(chunk, schema)
+            missing += chunk_missing
+            invalid += chunk_invalid
+            
+            # Roll numbers are checked against the class as it was and against this upload so far
+            rolls = chunk["Roll Number"].dropna()
+            existing, repeated_in_chunk = roster.find_duplicates(rolls)
+            chunk_in_class = [roll for roll in existing if roster.position(roll) < start]
+            chunk_repeated = set(repeated_in_chunk) | (seen & set(rolls))
+            in_class.update(chunk_in_class)
+            repeated.update(chunk_repeated)
+            seen.update(rolls)
+            
+            if not (missing or invalid or in_class or repeated):
+                # Marks are whole numbers by now; stored as integers they grade exactly as typed-in marks do
+                roster.extend(chunk.astype({subject: schema.mark_dtype for subject in schema.subjects}))
+            if progress:
+                fraction = min(source.tell() / total_bytes, 1.0) if total_bytes else 0.0
+                progress(len(roster) - start, fraction)
+        
+        errors = _messages(missing, invalid, in_class, repeated)
+        if errors:
+            raise ValueError(". ".join(errors) + ".")
+    except Exception:
+        roster.truncate(start)
+        raise
+    if progress:
+        progress(len(roster) - start, 1.0)
+    return len(roster) - start
+
+# Function to find the size of a file object or path, if it can be known
+def _size(source):
+    if isinstance(source, str):
+        return 0
+    try:
+        position = source.tell()
+        source.seek(0, 2)
+        size = source.tell()
+        source.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return 0
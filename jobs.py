@@ -0,0 +1,126 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# One piece of background work and what became of it
+# progress is a fraction from 0 to 1; result holds whatever the work returned;
+# profile is the ProfileRun recorded for the work, if it was profiled
+class Job:
+    def __init__(self, key, label=""):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.label = label
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.profile = None
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED)
+
+    # Progress callback handed to the work, called as report(items_done, items_total)
+    def report(self, done, total):
+        self.progress = min(done / total, 1.0) if total else 1.0
+
+# Registry of background jobs run on a small thread pool
+# Jobs are found again by id, so a session can look up its job on every rerun.
+# Submitting work under the key of a job that is queued, running or done returns
+# that job instead of starting another: keys include the roster version, so the
+# same request for an unchanged class is only ever worked on once.
+# Work submitted while the submitting thread is recording a profile run is recorded
+# as a run of its own, labelled "job" and carrying the submitting run's fields.
+# Finished jobs are forgotten after max_age seconds. limits caps how many finished
+# jobs of a kind (the first item of their key) are kept; the oldest go first.
+class JobQueue:
+    def __init__(self, workers=2, max_age=3600, limits=None):
+        self.max_age = max_age
+        self.limits = limits or {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-job")
+        self._jobs = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    # Jobs still remembered, oldest first
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._jobs.values()))
+
+    # Function to look up the queued, running or finished job submitted under a key, or None
+    # Lets a caller skip preparing work that submit would not start anyway
+    def find(self, key):
+        job = self._keys.get(key)
+        return job if job is not None and job.status != FAILED else None
+
+    # Function to run func(*args, progress=job.report, **kwargs) in the background
+    def submit(self, key, func, *args, label="", **kwargs):
+        with self._lock:
+            job = self._keys.get(key)
+            if job is not None and job.status != FAILED:
+                return job
+            job = Job(key, label)
+            self._jobs[job.id] = job
+            self._keys[key] = job
+        self._executor.submit(self._run, job, func, args, kwargs, profiling.current_run())
+        return job
+
+    # Function to look up a job by id, or None once it has been forgotten
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _run(self, job, func, args, kwargs, parent=None):
+        job.status = RUNNING
+        if parent is not None:
+            job.profile = profiling.start_run("job", parent.trace_memory, **parent.fields, job=job.label)
+        try:
+            job.result = func(*args, progress=job.report, **kwargs)
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            if job.profile is not None:
+                profiling.finish_run(job.profile)
+        job.finished = time.time()
+        if job.key[0] in self.limits:
+            with self._lock:
+                self._trim(job.key[0])
+
+    # Function to forget finished jobs submitted more than max_age seconds ago
+    def expire(self):
+        cutoff = time.time() - self.max_age
+        with self._lock:
+            for job in [job for job in self._jobs.values() if job.done and job.created < cutoff]:
+                self._forget(job)
+
+    # Function to forget the oldest finished jobs of a kind beyond its limit; call with the lock held
+    def _trim(self, kind):
+        finished = [job for job in self._jobs.values() if job.done and job.key[0] == kind]
+        for job in finished[:max(len(finished) - self.limits[kind], 0)]:
+            self._forget(job)
+
+    # Function to drop a job from the registry; call with the lock held
+    def _forget(self, job):
+        del self._jobs[job.id]
+        if self._keys.get(job.key) is job:
+            del self._keys[job.key]
+
+    # Function to stop taking work and wait for running jobs to finish
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,50 @@
+from fpdf import FPDF
+
+# Append-only text buffer standing in for FPDF's document string
+# FPDF 1.7 grows the document with buffer += text, which copies the whole string on
+# every write; this keeps the pieces in a list and joins them once, at output.
+class TextBuffer:
+    def __init__(self):
+        self._parts = []
+        self._length = 0
+
+    def __iadd__(self, text):
+        self._parts.append(text)
+        self._length += len(text)
+        return self
+
+    # FPDF records object offsets as len(buffer)
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return "".join(self._parts)
+
+# FPDF document with linear-time output
+# aliases maps placeholder text to its value; like FPDF's own page-count alias, the
+# placeholders are replaced on every page when the document is output, so a page can
+# be drawn (or reused) before values such as the class size are known.
+# Both rely on FPDF 1.7 keeping the document and its pages as text; under other
+# builds such as fpdf2 the buffer and pages are left alone and output() is FPDF's own.
+class ReportPDF(FPDF):
+    def __init__(self, aliases=None):
+        super().__init__()
+        self.aliases = aliases or {}
+        if isinstance(self.buffer, str):
+            self.buffer = TextBuffer()
+
+    def _putpages(self):
+        for n in range(1, self.page + 1):
+            if isinstance(self.pages[n], str):
+                for alias, value in self.aliases.items():
+                    self.pages[n] = self.pages[n].replace(alias, value)
+        super()._putpages()
+
+    # FPDF 1.7 closes the document inside output(), so it is closed here first and
+    # the buffer flattened back into the string output() expects
+    def output(self, *args, **kwargs):
+        if isinstance(self.buffer, TextBuffer):
+            if self.state < 3:
+                self.close()
+            self.buffer = str(self.buffer)
+        return super().output(*args, **kwargs)
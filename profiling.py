@@ -0,0 +1,179 @@
+import datetime
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Profiling is opt-in: REPORT_CARD_PROFILE=1 turns it on for every session. With
+# REPORT_CARD_PROFILE_URL=1 the app also turns it on for a single session opened with
+# ?profile=1; those sessions record timings only, since memory tracing slows the
+# whole process and any visitor can add the flag.
+# Finished runs are logged as one JSON object per line to the "report_card.profile"
+# logger, and appended to REPORT_CARD_PROFILE_LOG when that names a file.
+ENABLED = os.environ.get("REPORT_CARD_PROFILE", "") not in ("", "0")
+URL_OPT_IN = os.environ.get("REPORT_CARD_PROFILE_URL", "") not in ("", "0")
+LOG_PATH = os.environ.get("REPORT_CARD_PROFILE_LOG")
+
+logger = logging.getLogger("report_card.profile")
+if LOG_PATH:
+    _handler = logging.FileHandler(LOG_PATH)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+# Each thread has at most one run being recorded; Streamlit runs every session's
+# script in its own thread, so concurrent sessions never mix their stages
+_local = threading.local()
+
+# tracemalloc is process-wide, so it is started by the first run that needs it
+# and stopped when the last one finishes (unless something else turned it on)
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_started_tracing = False
+
+def _acquire_tracing():
+    global _tracing_runs, _started_tracing
+    with _tracing_lock:
+        if _tracing_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_runs += 1
+
+def _release_tracing():
+    global _tracing_runs, _started_tracing
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+# Timings for one run of the app script (or one CLI call), stage by stage
+# Stage times include any stages nested inside them. Allocation figures come from
+# tracemalloc, which sees the whole process, so they include other sessions'
+# allocations while they overlap.
+class ProfileRun:
+    def __init__(self, label, trace_memory=True, **fields):
+        self.label = label
+        self.fields = fields
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.stages = {}
+        self.seconds = None
+        self.trace_memory = trace_memory
+        self._start = time.perf_counter()
+        self._stack = []
+        if trace_memory:
+            _acquire_tracing()
+
+    # Context manager timing one stage; repeated stages add to the same entry
+    @contextmanager
+    def stage(self, name):
+        frame = self._enter()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            net_bytes, peak_bytes = self._exit(frame)
+            entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "net_bytes": 0, "peak_bytes": 0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["net_bytes"] += net_bytes
+            entry["peak_bytes"] = max(entry["peak_bytes"], peak_bytes)
+
+    # Memory tracking for nested stages: the peak is reset on entry so each stage
+    # sees its own high-water mark, and passed up to the enclosing stage on exit
+    def _enter(self):
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]
+        self._stack.append(frame)
+        return frame
+
+    def _exit(self, frame):
+        if frame is None:
+            return 0, 0
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(frame[1], peak)
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        return current - frame[0], peak - frame[0]
+
+    # Function to stop the clock and memory tracing; returns False if already finished
+    def finish(self):
+        if self.seconds is not None:
+            return False
+        self.seconds = time.perf_counter() - self._start
+        if self.trace_memory:
+            _release_tracing()
+        return True
+
+    # Function to list the stages, slowest first
+    def rows(self):
+        return [
+            {"stage": name, **entry}
+            for name, entry in sorted(self.stages.items(), key=lambda item: item[1]["seconds"], reverse=True)
+        ]
+
+    def to_dict(self):
+        return {
+            "event": "profile",
+            "label": self.label,
+            **self.fields,
+            "started": self.started.isoformat(timespec="milliseconds"),
+            "seconds": self.seconds,
+            "stages": self.rows(),
+        }
+
+# Function to start recording a run in this thread
+def start_run(label, trace_memory=True, **fields):
+    finish_run()
+    _local.run = ProfileRun(label, trace_memory, **fields)
+    return _local.run
+
+# Function to finish a run (by default this thread's) and write it to the profile log
+# Safe to call again for a run that has already finished, e.g. one cut short by
+# st.rerun(), which ends the script before its last line
+def finish_run(run=None):
+    if run is None:
+        run = getattr(_local, "run", None)
+        if run is None:
+            return None
+    if getattr(_local, "run", None) is run:
+        _local.run = None
+    if run.finish():
+        logger.info(json.dumps(run.to_dict()))
+    return run
+
+# Function to get the run being recorded in this thread, or None
+def current_run():
+    return getattr(_local, "run", None)
+
+# Context manager timing a stage of the current run; does nothing when no run is active
+@contextmanager
+def stage(name):
+    run = getattr(_local, "run", None)
+    if run is None:
+        yield
+        return
+    with run.stage(name):
+        yield
+
+# Decorator timing every call of a function as a stage named after it
+def profiled(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        run = getattr(_local, "run", None)
+        if run is None:
+            return func(*args, **kwargs)
+        with run.stage(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,371 @@
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from downloads import temp_files
+from grading import DEFAULT_SCHEMA
+from profiling import profiled
+from roster import competition_ranks
+
+# Fonts used on a report card, registered in this order in every document
+# so the cached page skeleton refers to the same font numbers everywhere
+FONTS = [("Arial", "B", 16), ("Arial", "B", 12), ("Arial", "", 12), ("Arial", "I", 8)]
+
+# Height available to the subject rows; long subject lists get shorter rows to stay on one page
+SUBJECT_TABLE_HEIGHT = 110
+
+# Written on pages in place of the class size and filled in when the document is output,
+# so a student's cached page stays valid when others join the class
+CLASS_SIZE_ALIAS = "{class_size}"
+
+# Memory kept for rendered pages (about 2 KB each)
+PAGE_CACHE_BYTES = 64 * 2**20
+
+# Rendered report card pages, keyed by everything drawn on them: the class header,
+# the student's record and their rank. Pages are FPDF page content, so they can be
+# put straight into any document started by ReportTemplate.new_pdf. The least
+# recently used pages are dropped once max_bytes is exceeded.
+class PageCache:
+    def __init__(self, max_bytes=PAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pages)
+
+    # Function to get a cached page, or None
+    def get(self, key):
+        with self._lock:
+            content = self._pages.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return content
+
+    # Function to cache a page, dropping the least recently used ones if over the limit
+    def put(self, key, content):
+        with self._lock:
+            previous = self._pages.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._pages[key] = content
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                _, dropped = self._pages.popitem(last=False)
+                self.size -= len(dropped)
+
+    # Function to drop every cached page
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self.size = 0
+
+# Pages shared by every document built in this process
+page_cache = PageCache()
+
+# Report card layout for one class, laid out once and stamped for each student
+# The first page is drawn normally with empty value cells while the position of
+# each value is recorded; the static drawing commands (title, class header,
+# labels, table borders, footer) are kept and copied onto every later page,
+# so only the per-student values are typeset page by page.
+# With a PageCache, a student whose page is cached is not typeset at all.
+class ReportTemplate:
+    def __init__(self, class_name="", class_teacher="", class_size=1, schema=DEFAULT_SCHEMA, cache=None):
+        self.class_name = class_name
+        self.class_teacher = class_teacher
+        self.class_size = class_size
+        self.schema = schema
+        self.cache = cache
+        self.row_height = min(10, SUBJECT_TABLE_HEIGHT / len(schema.subjects))
+        self._skeleton = None
+        self._slots = []
+        # Everything on a page that is the same for the whole class; the class size
+        # itself is left out, only whether the rank is shown
+        self._header = (class_name, class_teacher, class_size > 1, tuple(schema.subjects), self.row_height)
+
+    # Function to start a document with the template's fonts registered
+    # fpdf is imported on the first document rather than with this module
+    def new_pdf(self):
+        from pdf_writer import ReportPDF
+        pdf = ReportPDF({CLASS_SIZE_ALIAS: str(self.class_size)})
+        # A report card is always one page; keep the footer on it instead of breaking
+        pdf.set_auto_page_break(False)
+        for family, style, size in FONTS:
+            pdf.set_font(family, style, size)
+        return pdf
+
+    # Function to add one student's report card page
+    def add_page(self, pdf, student, rank=None):
+        pdf.add_page()
+        page = pdf.page
+        if not isinstance(pdf.pages.get(page), str):
+            # This FPDF build does not expose page content; draw the page in full
+            self._layout(pdf, self._values(student, rank, self.class_size))
+            return
+        
+        key = None
+        if self.cache is not None:
+            key = (self._header, tuple(student[column] for column in self.schema.columns), rank)
+            content = self.cache.get(key)
+            if content is not None:
+                pdf.pages[page] = content
+                return
+        
+        values = self._values(student, rank)
+        if self._skeleton is None:
+            skeleton_start = len(pdf.pages[page])
+            self._layout(pdf)
+            self._skeleton = pdf.pages[page][skeleton_start:]
+        else:
+            pdf.pages[page] += self._skeleton
+        self._fill(pdf, values)
+        if key is not None:
+            self.cache.put(key, pdf.pages[page])
+
+    # Function to format the fields that change from student to student
+    # The class size is an alias filled in at output unless given
+    def _values(self, student, rank, class_size=CLASS_SIZE_ALIAS):
+        values = {
+            "Name": student["Name"],
+            "Roll Number": student["Roll Number"],
+            "Total": str(student["Total"]),
+            "Percentage": f"{student['Percentage']:.2f}%",
+            "Grade": student["Grade"],
+            "Class Rank": f"{rank} out of {class_size}",
+        }
+        for subject in self.schema.subjects:
+            values[subject] = str(student[subject])
+        return values
+
+    # Function to write the recorded value slots, grouped by font
+    def _fill(self, pdf, values):
+        for style in ("", "B"):
+            pdf.font_family = ""  # the skeleton changed the font behind FPDF's back
+            pdf.set_font("Arial", style, 12)
+            for x, y, w, h, slot_style, key in self._slots:
+                if slot_style == style:
+                    pdf.set_xy(x, y)
+                    pdf.cell(w, h, values[key], 0, 0)
+
+    # Function to lay out the page; without values, value cells are left empty and recorded
+    def _layout(self, pdf, values=None):
+        def field(w, key, border=0, style="", h=10):
+            if values is None:
+                self._slots.append((pdf.get_x(), pdf.get_y(), w, h, style, key))
+                pdf.cell(w, h, "", border, 1)
+            else:
+                pdf.cell(w, h, values[key], border, 1)
+        
+        # Set up the PDF
+        pdf.set_font("Arial", "B", 16)
+        pdf.cell(190, 10, "Student Report Card", 0, 1, "C")
+        
+        # Class details if provided
+        if self.class_name:
+            pdf.set_font("Arial", "B", 12)
+            pdf.cell(190, 10, f"Class: {self.class_name}", 0, 1, "C")
+        if self.class_teacher:
+            pdf.set_font("Arial", "", 12)
+            pdf.cell(190, 10, f"Class Teacher: {self.class_teacher}", 0, 1, "C")
+            
+        pdf.line(10, pdf.get_y() + 5, 200, pdf.get_y() + 5)
+        pdf.cell(190, 10, "", 0, 1)  # Add some space
+        
+        # Student details
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(50, 10, "Name:", 0, 0)
+        pdf.set_font("Arial", "", 12)
+        field(140, "Name")
+        
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(50, 10, "Roll Number:", 0, 0)
+        pdf.set_font("Arial", "", 12)
+        field(140, "Roll Number")
+        
+        # Subject marks
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(190, 10, "", 0, 1)
+        pdf.cell(190, 10, "Subject Marks", 0, 1)
+        
+        # Table header
+        pdf.set_fill_color(200, 200, 200)
+        pdf.cell(95, 10, "Subject", 1, 0, "C", True)
+        pdf.cell(95, 10, "Marks", 1, 1, "C", True)
+        
+        # Table data
+        pdf.set_font("Arial", "", 12)
+        for subject in self.schema.subjects:
+            pdf.cell(95, self.row_height, subject, 1, 0)
+            field(95, subject, border=1, h=self.row_height)
+        
+        # Total
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(95, 10, "Total", 1, 0)
+        field(95, "Total", border=1, style="B")
+        
+        # Percentage and Grade
+        pdf.cell(190, 10, "", 0, 1)
+        pdf.cell(50, 10, "Percentage:", 0, 0)
+        pdf.set_font("Arial", "", 12)
+        field(140, "Percentage")
+        
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(50, 10, "Grade:", 0, 0)
+        pdf.set_font("Arial", "", 12)
+        field(140, "Grade")
+        
+        # Class Rank if more than one student
+        if self.class_size > 1:
+            pdf.set_font("Arial", "B", 12)
+            pdf.cell(50, 10, "Class Rank:", 0, 0)
+            pdf.set_font("Arial", "", 12)
+            field(140, "Class Rank")
+        
+        # Footer
+        pdf.set_y(-30)
+        pdf.set_font("Arial", "I", 8)
+        pdf.cell(0, 10, "This is an automatically generated report card.", 0, 0, "C")
+
+# Function to build a report card document for a list of students
+# class_size defaults to len(students); pass it when rendering part of a larger class
+# schema defaults to the roster's own, so the subject table matches the class
+# progress, if given, is called as progress(pages_done, pages_total) after each page
+# Pages come from the shared page cache where possible; pass cache=None to render every page
+@profiled
+def build_pdf(students, class_name="", class_teacher="", ranks=None, class_size=None, schema=None, progress=None,
+              cache=page_cache):
+    if class_size is None:
+        class_size = len(students)
+    template = ReportTemplate(class_name, class_teacher, class_size, _schema(students, schema), cache)
+    pdf = template.new_pdf()
+    
+    # Class ranks, computed once for the whole batch unless the caller already has them
+    if ranks is None and class_size > 1:
+        ranks = competition_ranks([s['Percentage'] for s in students])
+    
+    count = len(students)
+    for i, student in enumerate(students):
+        rank = int(ranks[i]) if class_size > 1 else None
+        template.add_page(pdf, student, rank)
+        if progress:
+            progress(i + 1, count)
+    return pdf
+
+# Function to get the finished document as bytes
+@profiled
+def pdf_bytes(pdf):
+    data = pdf.output(dest="S")
+    return data.encode("latin-1") if isinstance(data, str) else bytes(data)
+
+# Function to find the grading schema for a batch of students
+def _schema(students, schema=None):
+    return schema or getattr(students, "schema", DEFAULT_SCHEMA)
+
+# Function to create PDF report card
+@profiled
+def create_pdf(students, class_name="", class_teacher="", ranks=None, schema=None, progress=None):
+    pdf = build_pdf(students, class_name, class_teacher, ranks, schema=schema, progress=progress)
+    
+    # Save the PDF to a tracked temporary file
+    pdf_path = temp_files.create(".pdf")
+    pdf.output(pdf_path)
+    return pdf_path
+
+# Function to create PDF report card in memory, ready to serve as a download
+@profiled
+def create_pdf_bytes(students, class_name="", class_teacher="", ranks=None, schema=None):
+    return pdf_bytes(build_pdf(students, class_name, class_teacher, ranks, schema=schema))
+
+# Function to load fpdf and its font metrics ahead of the first real report card
+def warm_up():
+    student = {"Name": "", "Roll Number": "", "Total": 0, "Percentage": 0.0, "Grade": ""}
+    student.update(dict.fromkeys(DEFAULT_SCHEMA.subjects, 0))
+    pdf_bytes(build_pdf([student], cache=None))
+
+# Function to name a student's PDF inside the class archive
+def report_filename(student):
+    stem = re.sub(r"[^A-Za-z0-9_-]+", "_", f"{student['Roll Number']}_{student['Name']}").strip("_")
+    return f"{stem}_report_card.pdf"
+
+# Worker processes are started by a fork server (or spawned where there is none)
+# rather than forked: the app starts them from a job thread of a threaded server,
+# and forking a process with other threads running can deadlock the child
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Worker: render one chunk of the class as separate per-student PDFs
+# A chunk of a roster arrives as a slice of its table and becomes records only here
+def _render_chunk(chunk):
+    students, ranks, class_name, class_teacher, class_size, schema = chunk
+    if hasattr(students, "iloc"):
+        columns = [students[column].tolist() for column in schema.columns]
+        students = [dict(zip(schema.columns, values)) for values in zip(*columns)]
+    template = ReportTemplate(class_name, class_teacher, class_size, schema)
+    files = []
+    for student, rank in zip(students, ranks):
+        pdf = template.new_pdf()
+        template.add_page(pdf, student, rank)
+        files.append((report_filename(student), pdf_bytes(pdf)))
+    return files
+
+# Function to split the class into chunks of work for the process pool
+# A roster is sliced from its table, so only the chunks in flight exist as records
+def _chunks(students, ranks, class_name, class_teacher, chunk_size, schema):
+    rows = getattr(students, "frame", None)
+    if rows is None:
+        rows = list(students)
+    count = len(rows)
+    for start in range(0, count, chunk_size):
+        end = start + chunk_size
+        part = rows.iloc[start:end] if hasattr(rows, "iloc") else rows[start:end]
+        yield part, [int(rank) for rank in ranks[start:end]], class_name, class_teacher, count, schema
+
+# Function to write a ZIP of per-student report cards, rendering chunks in parallel
+# output may be a path or a writable, seekable file object
+# At most two chunks per worker are in flight, so memory stays bounded for any class size
+# progress, if given, is called as progress(files_written, files_total) after each chunk
+@profiled
+def create_zip(students, class_name="", class_teacher="", ranks=None, output=None, workers=None, chunk_size=100,
+               schema=None, progress=None):
+    if ranks is None:
+        ranks = students.ranks() if hasattr(students, "ranks") else competition_ranks([s['Percentage'] for s in students])
+    if output is None:
+        output = temp_files.create(".zip")
+    workers = workers or os.cpu_count() or 1
+    
+    chunks = _chunks(students, ranks, class_name, class_teacher, chunk_size, _schema(students, schema))
+    count = len(students)
+    written = 0
+    
+    # Function to add rendered files to the archive and report how far along it is
+    def write_files(files):
+        nonlocal written
+        for filename, data in files:
+            archive.writestr(filename, data)
+        written += len(files)
+        if progress:
+            progress(written, count)
+    
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        if workers == 1:
+            for chunk in chunks:
+                write_files(_render_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(POOL_START_METHOD)) as executor:
+                pending = []
+                for chunk in chunks:
+                    pending.append(executor.submit(_render_chunk, chunk))
+                    if len(pending) >= workers * 2:
+                        write_files(pending.pop(0).result())
+                for future in pending:
+                    write_files(future.result())
+    return output
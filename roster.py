@@ -0,0 +1,175 @@
+import copy
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from analytics import ClassStats
+from grading import DEFAULT_SCHEMA
+
+# Storage types: marks use the smallest integer that fits, grades are one of a handful of labels
+# Names are interned strings rather than a categorical: batches are appended with concat,
+# which drops categoricals whose categories differ, and names repeat far less than grades.
+# Roll numbers are unique, so they are plain strings shared with the roll number index.
+def column_dtypes(schema):
+    return {
+        "Name": object,
+        "Roll Number": object,
+        **{subject: schema.mark_dtype for subject in schema.subjects},
+        "Total": schema.total_dtype,
+        "Percentage": np.float64,
+        "Grade": pd.CategoricalDtype(schema.grades),
+    }
+
+# Function to create an empty roster table with the storage types applied
+def empty_frame(schema):
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in column_dtypes(schema).items()})
+
+# Function to rank percentages highest first; ties share the best rank (1, 2, 2, 4)
+def competition_ranks(percentages):
+    return pd.Series(percentages, dtype=np.float64).rank(method="min", ascending=False).astype(np.int32).to_numpy()
+
+# Function to convert a numpy scalar into the matching plain Python value
+def _native(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+# Class roster stored column by column, with an index from roll number to row
+# version changes on every edit, so it can key caches of anything derived from the roster
+# schema decides which subjects are stored and how students are graded
+class Roster:
+    def __init__(self, schema=DEFAULT_SCHEMA):
+        self.schema = schema
+        self._dtypes = column_dtypes(schema)
+        self._df = empty_frame(schema)
+        self._positions = {}
+        self._ranks = None
+        self.stats = ClassStats(schema)
+        self.version = uuid.uuid4().hex
+
+    def __len__(self):
+        return len(self._df)
+
+    def __iter__(self):
+        names = self.schema.columns
+        columns = [self._df[column].tolist() for column in names]
+        for values in zip(*columns):
+            yield dict(zip(names, values))
+
+    def __contains__(self, roll_number):
+        return str(roll_number) in self._positions
+
+    def __getitem__(self, position):
+        return {column: _native(self._df[column].iat[position]) for column in self.schema.columns}
+
+    # Read-only table of the whole class, already typed for analysis
+    @property
+    def frame(self):
+        return self._df
+
+    # Function to find a student's row by roll number
+    def position(self, roll_number):
+        return self._positions.get(str(roll_number))
+
+    # Function to look up a student record by roll number
+    def get(self, roll_number):
+        position = self._positions.get(str(roll_number))
+        if position is None:
+            return None
+        return self[position]
+
+    # Function to find the rows whose name or roll number contains the query text
+    def search(self, query=""):
+        query = query.strip()
+        if not query:
+            return np.arange(len(self._df))
+        mask = (
+            self._df["Name"].astype(str).str.contains(query, case=False, regex=False)
+            | self._df["Roll Number"].str.contains(query, case=False, regex=False)
+        )
+        return np.flatnonzero(mask.to_numpy())
+
+    # Function to find roll numbers in an upload that clash with the roster or repeat within it
+    # Returns (already in the roster, repeated in the upload), each sorted and de-duplicated
+    def find_duplicates(self, roll_numbers):
+        rolls = pd.Series(roll_numbers, dtype=object).astype(str)
+        existing = rolls[rolls.isin(self._positions.keys())].unique()
+        repeated = rolls[rolls.duplicated(keep=False)].unique()
+        return sorted(existing), sorted(repeated)
+
+    # Function to get the class rank of every student, in roster order
+    # Computed once per roster change and reused by every report card
+    def ranks(self):
+        if self._ranks is None:
+            self._ranks = competition_ranks(self._df["Percentage"].to_numpy())
+        return self._ranks
+
+    # Function to look up a student's class rank by roll number
+    def rank(self, roll_number):
+        position = self._positions.get(str(roll_number))
+        if position is None:
+            return None
+        return int(self.ranks()[position])
+
+    # Function to get a copy of the roster as it is now, for work that runs while it keeps changing
+    # The table itself is shared: edits replace it rather than changing it in place
+    def snapshot(self):
+        self.ranks()
+        frozen = copy.copy(self)
+        frozen._positions = dict(self._positions)
+        frozen.stats = copy.deepcopy(self.stats)
+        return frozen
+
+    # Function to add a single student
+    def add(self, student):
+        self.extend([student])
+
+    # Function to add a batch of students (a DataFrame or a list of dicts) in one step
+    def extend(self, students):
+        if not isinstance(students, pd.DataFrame):
+            students = pd.DataFrame(list(students), columns=self.schema.input_columns)
+        if students.empty:
+            return 0
+
+        existing, repeated = self.find_duplicates(students["Roll Number"])
+        if existing or repeated:
+            raise ValueError(f"Duplicate roll numbers: {', '.join(existing + repeated)}")
+
+        if self.schema.invalid_marks(students[self.schema.subjects]).to_numpy().any():
+            raise ValueError("Marks must be whole numbers between 0 and each subject's maximum.")
+        batch = self.schema.compute_results(students).astype(self._dtypes)
+        batch["Name"] = [sys.intern(name) if isinstance(name, str) else name for name in batch["Name"]]
+
+        start = len(self._df)
+        if start:
+            self._df = pd.concat([self._df, batch], ignore_index=True)
+        else:
+            self._df = batch.reset_index(drop=True)
+        self._positions.update(zip(batch["Roll Number"], range(start, start + len(batch))))
+        self._ranks = None
+        self.stats.update(batch)
+        self.version = uuid.uuid4().hex
+        return len(batch)
+
+    # Function to drop every student after the first length rows, e.g. to undo a failed import
+    def truncate(self, length):
+        if length >= len(self._df):
+            return
+        if length == 0:
+            self.clear()
+            return
+        for roll_number in self._df["Roll Number"].iloc[length:]:
+            del self._positions[roll_number]
+        self._df = self._df.iloc[:length].copy()
+        self._ranks = None
+        self.stats = ClassStats(self.schema)
+        self.stats.update(self._df)
+        self.version = uuid.uuid4().hex
+
+    # Function to remove every student
+    def clear(self):
+        self._df = empty_frame(self.schema)
+        self._positions = {}
+        self._ranks = None
+        self.stats = ClassStats(self.schema)
+        self.version = uuid.uuid4().hex
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from analytics import ClassStats, class_metrics
+from grading import DEFAULT_SCHEMA
+import ingest
+from roster import Roster
+
+# Columns that split a school upload into classes
+PARTITION_COLUMNS = ["Class", "Section"]
+
+# A whole school: one independent roster per (class, section)
+# Roll numbers only have to be unique within a class, and ranks and
+# statistics are per class; school figures are combined from the
+# per-class totals rather than by rescanning students. A class can also be
+# added as its totals alone, for figures over classes whose rosters are not loaded.
+class School:
+    def __init__(self):
+        self.classes = {}
+        self.totals = {}
+
+    def __len__(self):
+        return sum(stats.count for stats in self.class_stats().values())
+
+    # Function to add a class roster under its (class, section) key
+    def add_class(self, key, roster):
+        self.classes[key] = roster
+
+    # Function to add a class by its running totals only
+    def add_totals(self, key, stats):
+        self.totals[key] = stats
+
+    # Function to get every class's running totals by (class, section) key
+    def class_stats(self):
+        return {**{key: roster.stats for key, roster in self.classes.items()}, **self.totals}
+
+    # Function to build a school from a table with Class and Section columns,
+    # grading and ranking each class on its own thread
+    # Every row is checked as an uploaded CSV is before anything is converted;
+    # first_line is the line number of the table's first row, as for ingest.validate_chunk
+    @classmethod
+    def from_frame(cls, df, schema=DEFAULT_SCHEMA, workers=None, first_line=2):
+        missing_columns = [col for col in PARTITION_COLUMNS + schema.input_columns if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
+        
+        df = df.reset_index(drop=True)
+        errors = ingest.validate_chunk(df, schema, first_line)
+        unassigned = df[PARTITION_COLUMNS].isna().any(axis=1)
+        if unassigned.any():
+            errors.insert(0, f"Class or Section missing on lines {ingest.describe_rows(unassigned, df, first_line)}")
+        if errors:
+            raise ValueError(". ".join(errors) + ".")
+        
+        df = df.astype({column: str for column in PARTITION_COLUMNS})
+        df = df.astype({subject: schema.mark_dtype for subject in schema.subjects})
+        partitions = list(df.groupby(PARTITION_COLUMNS, sort=True))
+        
+        def build(partition):
+            key, rows = partition
+            roster = Roster(schema)
+            try:
+                roster.extend(rows[schema.input_columns])
+            except ValueError as e:
+                raise ValueError(f"Class {key[0]} section {key[1]}: {e}") from e
+            roster.ranks()
+            return key, roster
+        
+        school = cls()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for key, roster in executor.map(build, partitions):
+                school.add_class(key, roster)
+        return school
+
+    # Function to get school-wide statistics from the per-class totals
+    def stats(self):
+        return ClassStats.combine(self.class_stats().values())
+
+    # Function to compare classes side by side
+    def class_summary(self):
+        rows = []
+        for (class_name, section), stats in self.class_stats().items():
+            metrics = class_metrics(stats)
+            passed = stats.count - stats.grades[stats.schema.fail_grade]
+            rows.append({
+                "Class": class_name,
+                "Section": section,
+                "Students": metrics["Total Students"],
+                "Average": metrics["Class Average"],
+                "Highest": metrics["Highest Score"],
+                "Lowest": metrics["Lowest Score"],
+                "Pass Rate": passed / stats.count * 100 if stats.count else float("nan"),
+            })
+        return pd.DataFrame(rows, columns=["Class", "Section", "Students", "Average", "Highest", "Lowest", "Pass Rate"])
+
+    # Function to pick the best students across the school, from each class's top list
+    def top_performers(self, count=5):
+        tops = [
+            stats.top.assign(Class=class_name, Section=section)
+            for (class_name, section), stats in self.class_stats().items()
+            if not stats.top.empty
+        ]
+        if not tops:
+            return pd.DataFrame()
+        top = pd.concat(tops).nlargest(count, "Percentage", keep="first")
+        return top[["Class", "Section", "Name", "Roll Number", "Total", "Percentage", "Grade"]].reset_index(drop=True)
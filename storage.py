@@ -0,0 +1,224 @@
+import copy
+import json
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from analytics import ClassStats
+from grading import DEFAULT_SCHEMA, GradingSchema
+from roster import Roster
+
+# Each class stores its grading schema as JSON (empty for the default schema), and
+# each student's marks as one little-endian uint16 per subject, in schema order,
+# so classes with different subjects share the same table.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classes (
+    class_name TEXT PRIMARY KEY,
+    class_teacher TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL DEFAULT 0,
+    schema TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS students (
+    class_name TEXT NOT NULL REFERENCES classes (class_name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    "Name" TEXT,
+    "Roll Number" TEXT NOT NULL,
+    "Marks" BLOB NOT NULL,
+    "Total" INTEGER NOT NULL,
+    "Percentage" REAL NOT NULL,
+    "Grade" TEXT NOT NULL,
+    PRIMARY KEY (class_name, "Roll Number")
+);
+CREATE INDEX IF NOT EXISTS students_by_position ON students (class_name, position);
+CREATE INDEX IF NOT EXISTS students_by_percentage ON students (class_name, "Percentage" DESC);
+"""
+
+MARKS_DTYPE = np.dtype("<u2")
+STUDENT_COLUMNS = '"Name", "Roll Number", "Marks", "Total", "Percentage", "Grade"'
+
+# Students read at a time when adding up a saved class's totals
+STATS_CHUNK_SIZE = 50_000
+
+# SQLite file holding saved classes: class details plus one row per student
+class RosterStore:
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._lock = threading.Lock()
+        self._conn.executescript(SCHEMA)
+
+    # Function to list saved class names
+    def class_names(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT class_name FROM classes ORDER BY class_name")]
+
+    # Function to get (class_teacher, version) for a saved class, or None
+    def class_info(self, class_name):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT class_teacher, version FROM classes WHERE class_name = ?", (class_name,)
+            ).fetchone()
+
+    # Function to get (class_name, version) for every saved class; changes whenever any class does
+    def class_versions(self):
+        with self._lock:
+            return tuple(self._conn.execute("SELECT class_name, version FROM classes ORDER BY class_name"))
+
+    # Function to get the grading schema a saved class was stored with
+    def class_schema(self, class_name):
+        with self._lock:
+            row = self._conn.execute("SELECT schema FROM classes WHERE class_name = ?", (class_name,)).fetchone()
+        if row is None or not row[0]:
+            return DEFAULT_SCHEMA
+        return GradingSchema.from_dict(json.loads(row[0]))
+
+    # Function to create a class or update its teacher and grading schema
+    # Given the roster rows, the class's students are replaced by them in the same
+    # transaction; changing the schema of a class that has students needs them
+    def save_class(self, class_name, class_teacher="", schema=DEFAULT_SCHEMA, frame=None):
+        stored = "" if schema == DEFAULT_SCHEMA else json.dumps(schema.to_dict())
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO classes (class_name, class_teacher, schema) VALUES (?, ?, ?) "
+                "ON CONFLICT (class_name) DO UPDATE SET class_teacher = excluded.class_teacher, "
+                "schema = excluded.schema, version = version + 1",
+                (class_name, class_teacher, stored),
+            )
+            if frame is not None:
+                self._conn.execute("DELETE FROM students WHERE class_name = ?", (class_name,))
+                self._insert_students(class_name, frame, 0, schema)
+
+    # Function to append roster rows to a saved class, keeping their roster positions
+    def add_students(self, class_name, frame, start, schema=DEFAULT_SCHEMA):
+        with self._lock, self._conn:
+            self._insert_students(class_name, frame, start, schema)
+            self._conn.execute("UPDATE classes SET version = version + 1 WHERE class_name = ?", (class_name,))
+
+    # Function to write roster rows into the students table, packing the marks; the caller commits
+    def _insert_students(self, class_name, frame, start, schema):
+        marks = frame[schema.subjects].to_numpy(dtype=MARKS_DTYPE)
+        rows = zip(
+            frame["Name"], frame["Roll Number"], (row.tobytes() for row in marks),
+            frame["Total"], frame["Percentage"], frame["Grade"].astype(str),
+        )
+        self._conn.executemany(
+            f"INSERT INTO students (class_name, position, {STUDENT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((class_name, start + offset, *_plain(row)) for offset, row in enumerate(rows)),
+        )
+
+    # Function to remove every student from a saved class
+    def clear_students(self, class_name):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM students WHERE class_name = ?", (class_name,))
+            self._conn.execute("UPDATE classes SET version = version + 1 WHERE class_name = ?", (class_name,))
+
+    # Function to load a saved class into a new roster
+    def load_roster(self, class_name):
+        schema = self.class_schema(class_name)
+        with self._lock:
+            frame = pd.read_sql_query(
+                'SELECT "Name", "Roll Number", "Marks" FROM students WHERE class_name = ? ORDER BY position',
+                self._conn,
+                params=(class_name,),
+            )
+        marks = np.frombuffer(b"".join(frame.pop("Marks")), dtype=MARKS_DTYPE).reshape(len(frame), len(schema.subjects))
+        frame[schema.subjects] = marks
+        roster = Roster(schema)
+        roster.extend(frame)
+        return roster
+
+    # Function to add up a saved class's running totals from its stored results,
+    # a chunk at a time, without loading it into a roster or grading it again
+    # The read has a connection of its own, so it does not hold up other work on the store
+    def class_stats(self, class_name):
+        schema = self.class_schema(class_name)
+        stats = ClassStats(schema)
+        with closing(sqlite3.connect(self.path)) as conn:
+            chunks = pd.read_sql_query(
+                f'SELECT {STUDENT_COLUMNS} FROM students WHERE class_name = ? ORDER BY position',
+                conn,
+                params=(class_name,),
+                chunksize=STATS_CHUNK_SIZE,
+            )
+            for frame in chunks:
+                marks = np.frombuffer(b"".join(frame.pop("Marks")), dtype=MARKS_DTYPE).reshape(len(frame), len(schema.subjects))
+                frame[schema.subjects] = marks
+                stats.update(frame)
+        return stats
+
+    def close(self):
+        self._conn.close()
+
+# Function to turn numpy scalars in a row into values sqlite3 accepts
+def _plain(row):
+    return tuple(value.item() if hasattr(value, "item") else value for value in row)
+
+# Saved classes loaded into memory once per process and shared by every session
+# Sessions edit a shared roster inside editing(), which holds that class's lock and
+# then appends the new rows to the store; a roster is reloaded when the stored
+# version moves on without it (for example after another process wrote to it).
+# Each class has its own lock, so a long edit of one class never holds up the others.
+class SharedClasses:
+    def __init__(self, store):
+        self.store = store
+        self._rosters = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    # Function to get the lock for one class, creating it on first use
+    def _class_lock(self, class_name):
+        with self._lock:
+            return self._locks.setdefault(class_name, threading.RLock())
+
+    # Function to get the shared roster and teacher for a saved class, or None
+    def get(self, class_name):
+        info = self.store.class_info(class_name)
+        if info is None:
+            return None
+        class_teacher, version = info
+        with self._class_lock(class_name):
+            cached = self._rosters.get(class_name)
+            if cached is None or cached[1] != version:
+                cached = (self.store.load_roster(class_name), version)
+                self._rosters[class_name] = cached
+            return cached[0], class_teacher
+
+    # Function to get a saved class's running totals, from its shared roster when that is
+    # loaded and current, otherwise straight from the store; None if there is no such class
+    def stats(self, class_name):
+        info = self.store.class_info(class_name)
+        if info is None:
+            return None
+        with self._class_lock(class_name):
+            cached = self._rosters.get(class_name)
+            if cached is not None and cached[1] == info[1]:
+                return copy.deepcopy(cached[0].stats)
+        return self.store.class_stats(class_name)
+
+    # Function to save a roster under a class name and share it from then on
+    def save(self, class_name, class_teacher, roster):
+        with self._class_lock(class_name):
+            self.store.save_class(class_name, class_teacher, roster.schema, roster.frame)
+            self._rosters.pop(class_name, None)
+            return self.get(class_name)[0]
+
+    # Context manager for changing a saved class's roster; new rows are written on exit
+    @contextmanager
+    def editing(self, class_name):
+        with self._class_lock(class_name):
+            roster, _ = self.get(class_name)
+            saved = len(roster)
+            try:
+                yield roster
+            finally:
+                if len(roster) < saved:
+                    self.store.clear_students(class_name)
+                    saved = 0
+                if len(roster) > saved:
+                    self.store.add_students(class_name, roster.frame.iloc[saved:], saved, roster.schema)
+                self._rosters[class_name] = (roster, self.store.class_info(class_name)[1])
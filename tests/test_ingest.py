@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+from ingest import ingest_csv
+from roster import Roster
+
+# A student typed into the form and one imported from a CSV with the same total must tie
+def test_csv_and_form_students_with_equal_marks_tie():
+    roster = Roster()
+    roster.add({"Name": "Form", "Roll Number": "1", "Math": 85, "Physics": 82, "Urdu": 80, "English": 85, "Computer": 85})
+    csv = io.BytesIO(b"Name,Roll Number,Math,Physics,Urdu,English,Computer\nUpload,2,90,77,85,80,85\n")
+    ingest_csv(csv, roster)
+
+    form, upload = roster.get("1"), roster.get("2")
+    assert form["Total"] == upload["Total"] == 417
+    assert form["Percentage"] == upload["Percentage"]
+    assert roster.rank("1") == roster.rank("2") == 1
+
+# Problems in later chunks are reported with the first one, and nothing is imported
+def test_every_chunk_is_checked_before_failing():
+    roster = Roster()
+    rows = [f"S{i},{i},50,50,50,50,50" for i in range(6)]
+    rows[1] = "S1,1,101,50,50,50,50"
+    rows[4] = ",4,50,50,50,50,50"
+    rows[5] = "S5,0,50,50,50,50,50"
+    csv = io.BytesIO(("Name,Roll Number,Math,Physics,Urdu,English,Computer\n" + "\n".join(rows) + "\n").encode())
+    with pytest.raises(ValueError) as error:
+        ingest_csv(csv, roster, chunk_size=2)
+
+    message = str(error.value)
+    assert "missing on lines 6" in message
+    assert "maximum on lines 3" in message
+    assert "repeated in the CSV: 0" in message
+    assert len(roster) == 0